@@ -0,0 +1,149 @@
+"""
+HTTP client used by the Streamlit UI.
+
+All calls share one keep-alive requests.Session (created once per server
+process through st.cache_resource) with timeouts and retries with backoff.
+GET responses are cached through st.cache_data for a short TTL, and every
+successful create/update/delete clears that cache. Once an entry expires it
+is revalidated with If-None-Match, so unchanged data comes back as an empty
+304 instead of a full download. Timeouts, connection errors and exhausted
+retries come back as a 503 response instead of an exception, so every page
+reports them like any other API error.
+"""
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_BASE_URL = "https://employees-management-backend-9jey.onrender.com"
+
+# (connect, read) timeouts; the Render backend can take ~50 seconds to wake up
+TIMEOUT = (5, 60)
+READ_CACHE_TTL_SECONDS = 30
+REVALIDATION_MAX_ENTRIES = 256
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Returns the shared session; its connection pool keeps TLS connections open between reruns."""
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET", "HEAD"],
+        respect_retry_after_header=True,
+        # Hand back the last 5xx once retries run out instead of raising.
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _unreachable(url: str, error: requests.RequestException) -> requests.Response:
+    """A 503 response standing in for a timeout or connection error, so pages show it like any API error."""
+    response = requests.Response()
+    response.status_code = 503
+    response.reason = "Service Unavailable"
+    response.url = url
+    response._content = json.dumps({"detail": f"Could not reach the API: {error}"}).encode()
+    return response
+
+
+def request(method: str, path: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", TIMEOUT)
+    url = f"{API_BASE_URL}{path}"
+    try:
+        return get_session().request(method, url, **kwargs)
+    except requests.RequestException as e:
+        return _unreachable(url, e)
+
+
+@dataclass
+class CachedResponse:
+    """The parts of a response the UI reads, in a form st.cache_data can store."""
+    status_code: int
+    text: str
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _UncachedResponse(Exception):
+    # Raised inside the cached function so error responses are never cached.
+    def __init__(self, response):
+        self.response = response
+
+
+@st.cache_resource
+def _validated_responses() -> OrderedDict:
+    """ETag and last body per GET, kept across cache expiry and invalidation for revalidation."""
+    return OrderedDict()
+
+
+@st.cache_data(ttl=READ_CACHE_TTL_SECONDS, show_spinner=False)
+def _cached_get(path: str, params: dict = None) -> CachedResponse:
+    validated = _validated_responses()
+    key = (path, json.dumps(params, sort_keys=True, default=str))
+    previous = validated.get(key)
+    headers = {"If-None-Match": previous[0]} if previous else None
+
+    response = request("GET", path, params=params, headers=headers)
+    if response.status_code == 304 and previous:
+        validated.move_to_end(key)
+        return previous[1]
+    if not response.ok:
+        raise _UncachedResponse(response)
+
+    cached = CachedResponse(response.status_code, response.text)
+    etag = response.headers.get("ETag")
+    if etag:
+        validated[key] = (etag, cached)
+        validated.move_to_end(key)
+        while len(validated) > REVALIDATION_MAX_ENTRIES:
+            validated.popitem(last=False)
+    return cached
+
+
+def get(path: str, params: dict = None, cached: bool = True):
+    """GET a backend path, served from the read cache unless cached=False."""
+    if not cached:
+        return request("GET", path, params=params)
+    try:
+        return _cached_get(path, params)
+    except _UncachedResponse as e:
+        return e.response
+
+
+def invalidate_reads():
+    """Drops every cached GET response, e.g. after a write."""
+    _cached_get.clear()
+
+
+def _write(method: str, path: str, **kwargs) -> requests.Response:
+    response = request(method, path, **kwargs)
+    if response.ok:
+        invalidate_reads()
+    return response
+
+
+def post(path: str, **kwargs) -> requests.Response:
+    return _write("POST", path, **kwargs)
+
+
+def put(path: str, **kwargs) -> requests.Response:
+    return _write("PUT", path, **kwargs)
+
+
+def delete(path: str, **kwargs) -> requests.Response:
+    return _write("DELETE", path, **kwargs)
@@ -0,0 +1,115 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+# Percentiles reported per department. $percentile needs MongoDB 7.0+ (Atlas).
+SALARY_PERCENTILES = [0.25, 0.5, 0.75, 0.9]
+HISTOGRAM_FORMATS = {"month": "%Y-%m", "year": "%Y"}
+DEFAULT_SALARY_BAND = 10000
+# Narrow bands make one histogram row per distinct salary; the bound and the
+# row cap keep the report's size and work independent of salary_band.
+MIN_SALARY_BAND = 1
+MAX_SALARY_BANDS = 1000
+
+
+def analytics_match(
+    department: Optional[str] = None,
+    joined_after: Optional[date] = None,
+    joined_before: Optional[date] = None
+) -> dict:
+    query = {}
+    if department:
+        query["department"] = department
+    if joined_after or joined_before:
+        query["joining_date"] = {}
+        if joined_after:
+            query["joining_date"]["$gte"] = datetime.combine(joined_after, datetime.min.time())
+        if joined_before:
+            query["joining_date"]["$lte"] = datetime.combine(joined_before, datetime.min.time())
+    return query
+
+
+def analytics_pipeline(
+    match: dict, interval: str = "month", top_skills: int = 10, salary_band: float = DEFAULT_SALARY_BAND
+) -> List[dict]:
+    """
+    One $facet pass over the (filtered) collection producing per-department
+    headcount and salary distribution, a joining-date histogram, a salary-band
+    histogram and the most common skills.
+    """
+    return [
+        {"$match": match},
+        {"$facet": {
+            "departments": [
+                {"$group": {
+                    "_id": "$department",
+                    "headcount": {"$sum": 1},
+                    "avg_salary": {"$avg": "$salary"},
+                    "min_salary": {"$min": "$salary"},
+                    "max_salary": {"$max": "$salary"},
+                    "percentiles": {"$percentile": {
+                        "input": "$salary", "p": SALARY_PERCENTILES, "method": "approximate"
+                    }},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+            "joining_histogram": [
+                {"$group": {
+                    "_id": {"$dateToString": {"format": HISTOGRAM_FORMATS[interval], "date": "$joining_date"}},
+                    "count": {"$sum": 1},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+            "salary_histogram": [
+                {"$group": {
+                    "_id": {"$multiply": [{"$floor": {"$divide": ["$salary", salary_band]}}, salary_band]},
+                    "count": {"$sum": 1},
+                }},
+                {"$sort": {"_id": 1}},
+                {"$limit": MAX_SALARY_BANDS},
+            ],
+            "top_skills": [
+                {"$unwind": "$skills"},
+                {"$group": {"_id": "$skills", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": top_skills},
+            ],
+            "totals": [
+                {"$group": {"_id": None, "headcount": {"$sum": 1}, "avg_salary": {"$avg": "$salary"}}},
+            ],
+        }},
+    ]
+
+
+def salary_band_row(lower: float, band: float, count: int) -> dict:
+    return {"min_salary": lower, "max_salary": lower + band, "count": count}
+
+
+def analytics_helper(result: dict, salary_band: float = DEFAULT_SALARY_BAND) -> dict:
+    """Shapes the raw $facet output into the analytics response."""
+    totals = result["totals"][0] if result["totals"] else {"headcount": 0, "avg_salary": None}
+    return {
+        "headcount": totals["headcount"],
+        "avg_salary": totals["avg_salary"],
+        "departments": [
+            {
+                "department": doc["_id"],
+                "headcount": doc["headcount"],
+                "avg_salary": doc["avg_salary"],
+                "min_salary": doc["min_salary"],
+                "max_salary": doc["max_salary"],
+                "percentiles": {
+                    f"p{round(p * 100)}": value
+                    for p, value in zip(SALARY_PERCENTILES, doc["percentiles"])
+                },
+            }
+            for doc in result["departments"]
+        ],
+        "joining_histogram": [
+            {"period": doc["_id"], "count": doc["count"]} for doc in result["joining_histogram"]
+        ],
+        "salary_histogram": [
+            salary_band_row(doc["_id"], salary_band, doc["count"]) for doc in result["salary_histogram"]
+        ],
+        "top_skills": [{"skill": doc["_id"], "count": doc["count"]} for doc in result["top_skills"]],
+        "source": "database",
+    }
@@ -0,0 +1,533 @@
+import asyncio
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+from app.analytics import DEFAULT_SALARY_BAND, MAX_SALARY_BANDS, SALARY_PERCENTILES, salary_band_row
+from app.config import settings
+from app.database import employee_read_collection, EXPORT_MAX_TIME_MS
+from app.events import hub
+from app.metrics import analytics_snapshot_bytes, analytics_snapshot_rows
+
+try:
+    import numpy as np
+except ImportError:  # Optional: without NumPy, analytics always run as aggregations.
+    np = None
+
+# Columnar copy of the employee collection held in the API process, so the
+# analytics endpoint can answer from vectorized NumPy code instead of a full
+# aggregation. One row per stored employee version:
+#
+#   _oid         S12      ObjectId bytes, for incremental refresh and deletes
+#   _department  int16    code into self.departments (dictionary encoding)
+#   _salary      float64
+#   _days        int32    joining_date as days since 1970-01-01
+#   _month       int16    joining month as months since 1970-01, for histograms
+#   _version     int32    employee version, to skip unchanged documents
+#   _alive       bool     False once the employee was updated or deleted
+#   _skill_indptr / _skill_values   CSR layout: row i's skill codes are
+#                         _skill_values[_skill_indptr[i]:_skill_indptr[i + 1]]
+#
+# Updates tombstone the old row and append a new one, which keeps the CSR
+# arrays append-only; tombstones are compacted away once they make up a
+# quarter of the rows. A sorted (_index_keys, _index_rows) pair maps
+# ObjectIds to rows.
+EPOCH = datetime(1970, 1, 1)
+INITIAL_CAPACITY = 1024
+GROWTH_FACTOR = 1.5
+COMPACT_DEAD_FRACTION = 0.25
+LOAD_BATCH_SIZE = 10000
+# Reports kept per snapshot generation, so repeated dashboard loads are lookups.
+RESULT_CACHE_SIZE = 64
+# Re-read a few seconds before the watermark: updated_at comes from each API
+# worker's clock, so a write can land slightly "in the past".
+REFRESH_OVERLAP = timedelta(seconds=5)
+SNAPSHOT_PROJECTION = {"department": 1, "salary": 1, "joining_date": 1, "skills": 1, "version": 1, "updated_at": 1}
+
+
+def _to_month(value: date) -> int:
+    return (value.year - 1970) * 12 + value.month - 1
+
+
+def _to_days(value: date) -> int:
+    if isinstance(value, datetime):
+        return (value - EPOCH).days
+    return (value - EPOCH.date()).days
+
+
+class SnapshotTooLarge(Exception):
+    pass
+
+
+class EmployeeSnapshot:
+    def __init__(self, max_rows: int = settings.analytics_snapshot_max_rows):
+        self.max_rows = max_rows
+        self.departments: List[str] = []
+        self._department_lookup = {}
+        self.skills: List[str] = []
+        self._skill_lookup = {}
+        self.size = 0
+        self.dead = 0
+        self.generation = 0
+        self.watermark: Optional[datetime] = None
+        self.ready = False
+        self.error = None
+        self.last_refresh = None
+        self.last_reconcile = None
+        self._events = None
+        self._derived_cache = {}
+        # Held while the arrays change and while a report or the derived
+        # arrays are computed in a worker thread, so the event loop stays free
+        # and a report never sees a half-applied batch.
+        self._lock = asyncio.Lock()
+
+        self._oid = np.empty(INITIAL_CAPACITY, dtype="S12")
+        self._department = np.empty(INITIAL_CAPACITY, dtype=np.int16)
+        self._salary = np.empty(INITIAL_CAPACITY, dtype=np.float64)
+        self._days = np.empty(INITIAL_CAPACITY, dtype=np.int32)
+        self._month = np.empty(INITIAL_CAPACITY, dtype=np.int16)
+        self._version = np.empty(INITIAL_CAPACITY, dtype=np.int32)
+        self._alive = np.zeros(INITIAL_CAPACITY, dtype=bool)
+        self._skill_indptr = np.zeros(INITIAL_CAPACITY + 1, dtype=np.int64)
+        self._skill_values = np.empty(INITIAL_CAPACITY * 4, dtype=np.int32)
+        self._index_keys = np.empty(0, dtype="S12")
+        self._index_rows = np.empty(0, dtype=np.int64)
+
+    # Storage
+
+    @property
+    def rows(self) -> int:
+        return self.size - self.dead
+
+    def memory_bytes(self) -> int:
+        arrays = (
+            self._oid, self._department, self._salary, self._days, self._month, self._version, self._alive,
+            self._skill_indptr, self._skill_values, self._index_keys, self._index_rows,
+        )
+        derived = tuple(
+            self._derived_cache.get(name)
+            for name in ("salary_order", "sorted_departments", "sorted_salaries", "skill_rows")
+        )
+        vocabulary = sum(sys.getsizeof(name) for name in self.departments + self.skills)
+        return sum(array.nbytes for array in arrays + derived if array is not None) + vocabulary
+
+    def _reserve(self, rows: int, skill_values: int):
+        if rows > len(self._oid):
+            capacity = max(rows, int(len(self._oid) * GROWTH_FACTOR))
+            for name in ("_oid", "_department", "_salary", "_days", "_month", "_version", "_alive"):
+                array = getattr(self, name)
+                grown = np.zeros(capacity, dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                setattr(self, name, grown)
+            indptr = np.zeros(capacity + 1, dtype=np.int64)
+            indptr[:self.size + 1] = self._skill_indptr[:self.size + 1]
+            self._skill_indptr = indptr
+        if skill_values > len(self._skill_values):
+            capacity = max(skill_values, int(len(self._skill_values) * GROWTH_FACTOR))
+            grown = np.empty(capacity, dtype=np.int32)
+            used = self._skill_indptr[self.size]
+            grown[:used] = self._skill_values[:used]
+            self._skill_values = grown
+
+    @staticmethod
+    def _encode(lookup: dict, names: list, name: str) -> int:
+        code = lookup.get(name)
+        if code is None:
+            code = lookup[name] = len(names)
+            names.append(name)
+        return code
+
+    def _lookup(self, keys):
+        """Index positions of the keys (or -1) and their rows (or -1)."""
+        if not len(self._index_keys):
+            missing = np.full(len(keys), -1, dtype=np.int64)
+            return missing, missing.copy()
+        positions = np.searchsorted(self._index_keys, keys)
+        clipped = np.minimum(positions, len(self._index_keys) - 1)
+        found = self._index_keys[clipped] == keys
+        return np.where(found, clipped, -1), np.where(found, self._index_rows[clipped], -1)
+
+    def _rebuild_index(self):
+        rows = np.flatnonzero(self._alive[:self.size])
+        order = np.argsort(self._oid[rows], kind="stable")
+        self._index_keys = self._oid[rows][order]
+        self._index_rows = rows[order]
+
+    def _tombstone(self, rows):
+        rows = rows[self._alive[rows]]
+        self._alive[rows] = False
+        self.dead += len(rows)
+
+    def _append(self, documents: List[dict], keys) -> int:
+        count = len(documents)
+        if self.rows + count > self.max_rows:
+            raise SnapshotTooLarge(f"more than {self.max_rows} employees")
+        start = self.size
+        end = start + count
+        skills = [document.get("skills") or [] for document in documents]
+        lengths = np.fromiter((len(values) for values in skills), dtype=np.int64, count=count)
+        skill_start = self._skill_indptr[start]
+        self._reserve(end, skill_start + int(lengths.sum()))
+
+        self._oid[start:end] = keys
+        self._department[start:end] = [
+            self._encode(self._department_lookup, self.departments, document["department"]) for document in documents
+        ]
+        self._salary[start:end] = [document["salary"] for document in documents]
+        self._days[start:end] = [_to_days(document["joining_date"]) for document in documents]
+        self._month[start:end] = [_to_month(document["joining_date"]) for document in documents]
+        self._version[start:end] = [document.get("version", 1) for document in documents]
+        self._alive[start:end] = True
+        self._skill_indptr[start + 1:end + 1] = skill_start + np.cumsum(lengths)
+        self._skill_values[skill_start:self._skill_indptr[end]] = [
+            self._encode(self._skill_lookup, self.skills, skill) for values in skills for skill in values
+        ]
+        self.size = end
+        return count
+
+    def apply(self, documents: List[dict]) -> int:
+        """Inserts new employees and replaces changed ones; returns how many rows were written."""
+        if not documents:
+            return 0
+        keys = np.array([document["_id"].binary for document in documents], dtype="S12")
+        versions = np.array([document.get("version", 1) for document in documents], dtype=np.int32)
+        positions, rows = self._lookup(keys)
+
+        existing = rows >= 0
+        live = existing.copy()
+        live[existing] = self._alive[rows[existing]]
+        unchanged = live.copy()
+        unchanged[live] = self._version[rows[live]] == versions[live]
+        self._tombstone(rows[live & ~unchanged])
+
+        changed = np.flatnonzero(~unchanged)
+        first_row = self.size
+        written = self._append([documents[i] for i in changed], keys[changed])
+        new_rows = np.arange(first_row, first_row + written, dtype=np.int64)
+
+        # Keys already in the index point at their new row; the others are merged in.
+        indexed = positions[changed] >= 0
+        self._index_rows[positions[changed][indexed]] = new_rows[indexed]
+        if (~indexed).any():
+            new_keys = keys[changed][~indexed]
+            order = np.argsort(new_keys, kind="stable")
+            at = np.searchsorted(self._index_keys, new_keys[order])
+            self._index_keys = np.insert(self._index_keys, at, new_keys[order])
+            self._index_rows = np.insert(self._index_rows, at, new_rows[~indexed][order])
+
+        timestamps = [document["updated_at"] for document in documents if document.get("updated_at")]
+        if timestamps:
+            self.watermark = max(timestamps + ([self.watermark] if self.watermark else []))
+        self._after_change(written)
+        return written
+
+    def remove(self, object_ids) -> int:
+        """Drops employees by ObjectId, e.g. after deletes."""
+        keys = np.array([object_id.binary for object_id in object_ids], dtype="S12")
+        if not len(keys):
+            return 0
+        _, rows = self._lookup(keys)
+        dead_before = self.dead
+        self._tombstone(rows[rows >= 0])
+        removed = self.dead - dead_before
+        self._after_change(removed)
+        return removed
+
+    def _after_change(self, changed: int):
+        if changed:
+            self.generation += 1
+        if self.dead and self.dead >= self.size * COMPACT_DEAD_FRACTION:
+            self.compact()
+
+    def compact(self):
+        """Drops tombstoned rows and rebuilds the CSR skill arrays and the id index."""
+        keep = self._alive[:self.size]
+        lengths = np.diff(self._skill_indptr[:self.size + 1])
+        skill_values = self._skill_values[:self._skill_indptr[self.size]][np.repeat(keep, lengths)]
+        for name in ("_oid", "_department", "_salary", "_days", "_month", "_version", "_alive"):
+            setattr(self, name, getattr(self, name)[:self.size][keep].copy())
+        self._skill_indptr = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(lengths[keep])))
+        self._skill_values = skill_values
+        self.size = len(self._oid)
+        self.dead = 0
+        self._rebuild_index()
+
+    # Loading and refresh
+
+    async def _read(self, query: dict) -> int:
+        written = 0
+        batch = []
+        cursor = employee_read_collection.find(
+            query, SNAPSHOT_PROJECTION, batch_size=LOAD_BATCH_SIZE, max_time_ms=EXPORT_MAX_TIME_MS
+        )
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= LOAD_BATCH_SIZE:
+                async with self._lock:
+                    written += self.apply(batch)
+                batch = []
+        async with self._lock:
+            written += self.apply(batch)
+        return written
+
+    async def load(self):
+        started = time.perf_counter()
+        self._events = hub.subscribe()
+        await self._read({})
+        async with self._lock:
+            self.compact()
+            await asyncio.to_thread(self._derived)
+        self.ready = True
+        self.last_refresh = self.last_reconcile = time.time()
+        self._report()
+        print(f"Analytics snapshot loaded {self.rows} employees in {time.perf_counter() - started:.1f}s "
+              f"({self.memory_bytes() / 2**20:.1f} MiB).")
+
+    async def refresh(self) -> int:
+        """Applies deletes seen on the change feed and re-reads employees changed since the watermark."""
+        reconcile = False
+        deleted = []
+        while self._events is not None and not self._events.empty():
+            entry = self._events.get_nowait()
+            if entry is None:
+                # The feed dropped us for falling behind; deletes may have been missed.
+                reconcile = True
+                self._events = hub.subscribe()
+                break
+            event = entry[1]
+            if event["op"] == "delete" and event["id"]:
+                deleted.append(ObjectId(event["id"]))
+            elif event["op"] == "reset":
+                reconcile = True
+        async with self._lock:
+            self.remove(deleted)
+
+        query = {"updated_at": {"$gte": self.watermark - REFRESH_OVERLAP}} if self.watermark else {}
+        written = await self._read(query)
+        if reconcile or time.time() - self.last_reconcile >= settings.analytics_snapshot_reconcile_seconds:
+            await self.reconcile()
+        # Rebuild the query helpers here rather than in the next request, off
+        # the event loop: the lexsort takes a few hundred ms at a million rows.
+        async with self._lock:
+            await asyncio.to_thread(self._derived)
+        self.last_refresh = time.time()
+        self._report()
+        return written
+
+    async def reconcile(self) -> int:
+        """Drops rows whose employees no longer exist (deleted by other processes or directly in MongoDB)."""
+        chunks = [np.empty(0, dtype="S12")]
+        batch = []
+        cursor = employee_read_collection.find(
+            {}, {"_id": 1}, batch_size=LOAD_BATCH_SIZE, max_time_ms=EXPORT_MAX_TIME_MS
+        )
+        async for document in cursor:
+            batch.append(document["_id"].binary)
+            if len(batch) >= LOAD_BATCH_SIZE:
+                chunks.append(np.array(batch, dtype="S12"))
+                batch = []
+        chunks.append(np.array(batch, dtype="S12"))
+        stored = np.concatenate(chunks)
+        async with self._lock:
+            alive_rows = np.flatnonzero(self._alive[:self.size])
+            keys = self._oid[alive_rows]
+            exists = await asyncio.to_thread(np.isin, keys, stored)
+            dead_before = self.dead
+            self._tombstone(alive_rows[~exists])
+            removed = self.dead - dead_before
+            self._after_change(removed)
+        self.last_reconcile = time.time()
+        return removed
+
+    def _report(self):
+        analytics_snapshot_rows.set(self.rows)
+        analytics_snapshot_bytes.set(self.memory_bytes())
+
+    async def run(self):
+        """Loads the snapshot, then keeps it fresh until cancelled."""
+        while True:
+            try:
+                if not self.ready:
+                    await self.load()
+                await asyncio.sleep(settings.analytics_snapshot_refresh_seconds)
+                await self.refresh()
+            except SnapshotTooLarge as e:
+                self.ready = False
+                self.error = str(e)
+                print(f"Analytics snapshot disabled: {e}; analytics fall back to aggregations.")
+                if self._events is not None:
+                    hub.unsubscribe(self._events)
+                return
+            except PyMongoError as e:
+                self.error = str(e)
+                print(f"Analytics snapshot refresh failed, retrying: {e}")
+                await asyncio.sleep(settings.analytics_snapshot_refresh_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "ready": self.ready,
+            "rows": self.rows,
+            "tombstones": self.dead,
+            "departments": len(self.departments),
+            "skills": len(self.skills),
+            "memory_bytes": self.memory_bytes(),
+            "bytes_per_employee": round(self.memory_bytes() / self.rows, 1) if self.rows else None,
+            "generation": self.generation,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "last_refresh": self.last_refresh,
+            "error": self.error,
+        }
+
+    # Queries
+
+    def _derived(self) -> dict:
+        """
+        Query-time helpers rebuilt once per generation: alive rows ordered by
+        (department, salary), so per-department min/max/percentiles need no
+        sort per request, and the row of every CSR skill value.
+        """
+        if self._derived_cache.get("generation") != self.generation:
+            rows = np.flatnonzero(self._alive[:self.size])
+            order = rows[np.lexsort((self._salary[rows], self._department[rows]))].astype(np.int32)
+            lengths = np.diff(self._skill_indptr[:self.size + 1])
+            self._derived_cache = {
+                "generation": self.generation,
+                "salary_order": order,
+                "sorted_departments": self._department[order],
+                "sorted_salaries": self._salary[order],
+                "skill_rows": np.repeat(np.arange(self.size, dtype=np.int32), lengths),
+                "skill_name_rank": np.argsort(np.argsort(np.array(self.skills, dtype=object))),
+                "results": {},
+            }
+        return self._derived_cache
+
+    def _mask(self, department: Optional[str], joined_after: Optional[date], joined_before: Optional[date]):
+        mask = self._alive[:self.size].copy()
+        if department:
+            code = self._department_lookup.get(department)
+            if code is None:
+                mask[:] = False
+            else:
+                mask &= self._department[:self.size] == code
+        if joined_after:
+            mask &= self._days[:self.size] >= _to_days(joined_after)
+        if joined_before:
+            mask &= self._days[:self.size] <= _to_days(joined_before)
+        return mask
+
+    def _department_rows(self, mask, derived: dict) -> List[dict]:
+        codes = derived["sorted_departments"]
+        salaries = derived["sorted_salaries"]
+        if mask is not None:
+            selected = mask[derived["salary_order"]]
+            codes = codes[selected]
+            salaries = salaries[selected]
+        counts = np.bincount(codes, minlength=len(self.departments))
+        sums = np.bincount(codes, weights=salaries, minlength=len(self.departments))
+        starts = np.cumsum(counts) - counts
+        present = np.flatnonzero(counts)
+        present = present[np.argsort([self.departments[code] for code in present], kind="stable")]
+
+        first = starts[present]
+        last = first + counts[present] - 1
+        percentiles = {}
+        for p in SALARY_PERCENTILES:
+            position = first + p * (counts[present] - 1)
+            low = np.floor(position).astype(np.int64)
+            high = np.ceil(position).astype(np.int64)
+            percentiles[f"p{round(p * 100)}"] = salaries[low] + (salaries[high] - salaries[low]) * (position - low)
+
+        return [
+            {
+                "department": self.departments[code],
+                "headcount": int(counts[code]),
+                "avg_salary": float(sums[code] / counts[code]),
+                "min_salary": float(salaries[first[i]]),
+                "max_salary": float(salaries[last[i]]),
+                "percentiles": {name: float(values[i]) for name, values in percentiles.items()},
+            }
+            for i, code in enumerate(present)
+        ]
+
+    def _top_skills(self, mask, top_skills: int, derived: dict) -> List[dict]:
+        values = self._skill_values[:self._skill_indptr[self.size]]
+        if mask is None:
+            values = values[self._alive[derived["skill_rows"]]]
+        else:
+            values = values[mask[derived["skill_rows"]]]
+        counts = np.bincount(values, minlength=len(self.skills))
+        order = np.lexsort((derived["skill_name_rank"], -counts))[:top_skills]
+        return [{"skill": self.skills[code], "count": int(counts[code])} for code in order if counts[code]]
+
+    @staticmethod
+    def _histogram(buckets) -> tuple:
+        """Counts per distinct integer bucket, ascending; memory scales with the non-empty buckets."""
+        return np.unique(buckets, return_counts=True)
+
+    def analytics(
+        self,
+        department: Optional[str] = None,
+        joined_after: Optional[date] = None,
+        joined_before: Optional[date] = None,
+        interval: str = "month",
+        top_skills: int = 10,
+        salary_band: float = DEFAULT_SALARY_BAND
+    ) -> dict:
+        """Same report as the $facet aggregation, computed from the snapshot."""
+        derived = self._derived()
+        key = (department, joined_after, joined_before, interval, top_skills, salary_band)
+        cached = derived["results"].get(key)
+        if cached is not None:
+            return cached
+
+        # Without filters every live row is selected, and the presorted
+        # department/salary arrays can be used as they are.
+        filtered = bool(department or joined_after or joined_before)
+        mask = self._mask(department, joined_after, joined_before)
+        salaries = self._salary[:self.size][mask]
+        headcount = len(salaries)
+
+        months = self._month[:self.size][mask].astype(np.int64)
+        unit = "datetime64[M]" if interval == "month" else "datetime64[Y]"
+        periods, period_counts = self._histogram(months if interval == "month" else months // 12)
+        bands, band_counts = self._histogram(np.floor(salaries / salary_band).astype(np.int64))
+        bands, band_counts = bands[:MAX_SALARY_BANDS], band_counts[:MAX_SALARY_BANDS]
+
+        result = {
+            "headcount": headcount,
+            "avg_salary": float(salaries.mean()) if headcount else None,
+            "departments": self._department_rows(mask if filtered else None, derived),
+            "joining_histogram": [
+                {"period": str(period), "count": int(count)}
+                for period, count in zip(periods.astype(unit), period_counts)
+            ],
+            "salary_histogram": [
+                salary_band_row(float(band * salary_band), salary_band, int(count))
+                for band, count in zip(bands, band_counts)
+            ],
+            "top_skills": self._top_skills(mask if filtered else None, top_skills, derived),
+            "source": "snapshot",
+        }
+        if len(derived["results"]) < RESULT_CACHE_SIZE:
+            derived["results"][key] = result
+        return result
+
+    async def run_analytics(self, *args) -> dict:
+        """Computes analytics() in a worker thread so the event loop keeps serving requests."""
+        async with self._lock:
+            return await asyncio.to_thread(self.analytics, *args)
+
+
+def create_snapshot() -> Optional[EmployeeSnapshot]:
+    if not settings.analytics_snapshot_enabled:
+        return None
+    if np is None:
+        print("ANALYTICS_SNAPSHOT_ENABLED is set but NumPy is not installed; using aggregations.")
+        return None
+    return EmployeeSnapshot()
+
+
+snapshot = create_snapshot()
@@ -4,23 +4,71 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import time
+from app.config import settings
+from app.metrics import jwt_decode_duration, password_hash_duration
 
 # Configuration
-SECRET_KEY = "your-super-secret-key"
+SECRET_KEY = settings.secret_key
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+TOKEN_CACHE_MAX_ENTRIES = 4096
+
+# bcrypt runs in a small thread pool (it releases the GIL) so logins never block
+# the event loop. Callers wait at most PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot.
+PASSWORD_HASH_CONCURRENCY = settings.password_hash_concurrency
+PASSWORD_HASH_QUEUE_TIMEOUT = settings.password_hash_queue_timeout
 
 # For password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt"
+)
+_password_slots = asyncio.Semaphore(PASSWORD_HASH_CONCURRENCY)
+
 # For FastAPI's dependency injection to find the token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    finally:
+        password_hash_duration.observe(time.perf_counter() - started, "verify")
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    started = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        password_hash_duration.observe(time.perf_counter() - started, "hash")
+
+async def _run_password_task(func, *args):
+    """Runs a bcrypt call on the password pool, shedding load once the queue wait exceeds the timeout."""
+    try:
+        await asyncio.wait_for(_password_slots.acquire(), timeout=PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_slots.release()
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_password_task(get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -32,18 +80,63 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
+# Verified tokens, keyed by SHA-256 digest -> (username, exp as epoch seconds).
+# Entries are only trusted until the token's own exp, so expiry still applies.
+_token_cache = OrderedDict()
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def forget_token(token: str):
+    """Drops a token from the verification cache, e.g. when it is revoked."""
+    _token_cache.pop(_token_digest(token), None)
+
+
+def clear_token_cache():
+    _token_cache.clear()
+
+
+def decode_token(token: str) -> str:
+    """Verifies the token and returns its subject, using the verification cache when possible."""
+    started = time.perf_counter()
+    digest = _token_digest(token)
+    cached = _token_cache.get(digest)
+    if cached is not None:
+        username, expires_at = cached
+        if expires_at > time.time():
+            _token_cache.move_to_end(digest)
+            jwt_decode_duration.observe(time.perf_counter() - started, "true")
+            return username
+        del _token_cache[digest]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    return {"username": username}
\ No newline at end of file
+        raise _credentials_exception()
+    finally:
+        jwt_decode_duration.observe(time.perf_counter() - started, "false")
+    username: str = payload.get("sub")
+    expires_at = payload.get("exp")
+    if username is None:
+        raise _credentials_exception()
+
+    # Tokens without exp are verified every time rather than cached forever.
+    if expires_at is not None:
+        _token_cache[digest] = (username, expires_at)
+        if len(_token_cache) > TOKEN_CACHE_MAX_ENTRIES:
+            _token_cache.popitem(last=False)
+    return username
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return {"username": decode_token(token)}
\ No newline at end of file
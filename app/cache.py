@@ -0,0 +1,193 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.config import settings
+
+CACHE_BACKEND = settings.cache_backend
+CACHE_TTL_SECONDS = settings.cache_ttl_seconds
+CACHE_MAX_ENTRIES = settings.cache_max_entries
+
+# Cache keys used by the employee routes
+AVG_SALARY_KEY = "avg_salary_by_department:v2"
+
+
+def employee_key(employee_id: str) -> str:
+    return f"employee:{employee_id}"
+
+# Read-through callers take invalidation_token() before reading the database
+# and pass it to set()/set_many(). Every delete() and clear() moves the token,
+# so a value read before a concurrent write invalidated it is not stored
+# (and then served stale for a whole TTL).
+
+
+class MemoryCache:
+    """In-process LRU cache whose entries also expire after a TTL."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def invalidation_token(self) -> int:
+        return self.invalidations
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, token: Optional[int] = None):
+        if token is not None and token != self.invalidations:
+            return
+        self._entries[key] = (value, time.monotonic() + (ttl or self.ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Returns the cached values found for the given keys."""
+        found = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None, token: Optional[int] = None):
+        for key, value in items.items():
+            await self.set(key, value, ttl, token)
+
+    async def delete(self, *keys: str):
+        self.invalidations += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self):
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Stores KEYS[2..] = ARGV[3..] with a PX of ARGV[2], only if the invalidation
+# counter KEYS[1] still equals the token ARGV[1].
+_REDIS_SET_IF_CURRENT_SCRIPT = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+for i = 2, #KEYS do
+    redis.call('SET', KEYS[i], ARGV[i + 1], 'PX', ARGV[2])
+end
+return 1
+"""
+
+
+class RedisCache:
+    """Redis-compatible backend, shared by every API worker. Values are stored as JSON."""
+
+    def __init__(self, url: str = settings.redis_url, ttl: float = CACHE_TTL_SECONDS, prefix: str = "employees:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._set_if_current = self._redis.register_script(_REDIS_SET_IF_CURRENT_SCRIPT)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.invalidations_key = prefix + "__invalidations"
+        self.hits = 0
+        self.misses = 0
+
+    async def invalidation_token(self) -> str:
+        raw = await self._redis.get(self.invalidations_key)
+        return raw.decode() if raw else "0"
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None, token: Optional[str] = None):
+        if token is not None:
+            await self.set_many({key: value}, ttl, token)
+            return
+        await self._redis.set(self.prefix + key, json.dumps(value), px=int((ttl or self.ttl) * 1000))
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Fetches every key with a single MGET."""
+        if not keys:
+            return {}
+        values = await self._redis.mget([self.prefix + key for key in keys])
+        found = {key: json.loads(raw) for key, raw in zip(keys, values) if raw is not None}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None, token: Optional[str] = None):
+        if not items:
+            return
+        if token is not None:
+            await self._set_if_current(
+                keys=[self.invalidations_key, *(self.prefix + key for key in items)],
+                args=[token, int((ttl or self.ttl) * 1000), *(json.dumps(value) for value in items.values())]
+            )
+            return
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self.prefix + key, json.dumps(value), px=int((ttl or self.ttl) * 1000))
+            await pipe.execute()
+
+    async def delete(self, *keys: str):
+        if keys:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self.prefix + key for key in keys))
+                pipe.incr(self.invalidations_key)
+                await pipe.execute()
+
+    async def clear(self):
+        # The counter survives (and moves), so tokens taken before the clear stay stale.
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            if key.decode() != self.invalidations_key:
+                await self._redis.delete(key)
+        await self._redis.incr(self.invalidations_key)
+
+    def stats(self) -> dict:
+        # Evictions happen inside Redis (maxmemory policy) and are reported by its INFO command.
+        return {"backend": "redis", "hits": self.hits, "misses": self.misses}
+
+
+def create_cache():
+    if CACHE_BACKEND == "redis":
+        print(f"Using Redis cache backend at {settings.redis_url}")
+        return RedisCache()
+    return MemoryCache()
+
+
+cache = create_cache()
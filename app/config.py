@@ -0,0 +1,114 @@
+from typing import Dict, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """
+    Application settings, read from environment variables (case-insensitive)
+    or the .env file. Durations are in milliseconds unless noted.
+    """
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # MongoDB connection
+    mongo_details: Optional[str] = None
+    database_name: str = "assessment_db"
+    skip_schema_setup_if_current: bool = True
+    database_setup_retry_seconds: float = 1
+    database_setup_retry_max_seconds: float = 60
+
+    # Connection pool
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_max_idle_time_ms: int = 300_000
+    mongo_wait_queue_timeout_ms: int = 5_000
+
+    # Timeouts
+    mongo_server_selection_timeout_ms: int = 5_000
+    mongo_connect_timeout_ms: int = 5_000
+    mongo_socket_timeout_ms: int = 60_000
+    # Server-side limit for every find and aggregate issued by request handlers
+    query_max_time_ms: int = 5_000
+    # Longer limit for streaming exports and maintenance jobs that scan the collection
+    export_max_time_ms: int = 600_000
+
+    # Reads that tolerate slightly stale data (listing, search, analytics)
+    secondary_read_preference: str = "secondaryPreferred"
+
+    # Write concern
+    mongo_write_concern: str = "majority"
+    mongo_write_timeout_ms: int = 10_000
+    mongo_journal: bool = True
+
+    # Wire compression, in order of preference. Codecs whose Python package
+    # is not installed are skipped by the driver; zlib is always available.
+    mongo_compressors: str = "zstd,snappy,zlib"
+
+    # Commands slower than this (milliseconds) are logged
+    slow_query_ms: float = 200
+    # Request metrics and MongoDB command/pool listeners; off only for benchmarks
+    metrics_enabled: bool = True
+
+    # Read-through cache ("memory" or "redis"); TTL in seconds
+    cache_backend: str = "memory"
+    cache_ttl_seconds: float = 60
+    cache_max_entries: int = 10_000
+
+    # Auth
+    secret_key: str = "your-super-secret-key"
+    access_token_expire_minutes: int = 30
+    # bcrypt threads, and how long (seconds) a login waits for one
+    password_hash_concurrency: int = 2
+    password_hash_queue_timeout: float = 5
+    # Precomputed hash for the seed user; hashed on first login otherwise
+    test_user_password_hash: Optional[str] = None
+
+    # Rate limiting: token buckets per client and route, stored in memory or
+    # in Redis when several workers must share them. RATE_LIMITS overrides
+    # individual routes as JSON, e.g. {"login": "5/minute"}.
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    # Shared by the Redis cache and rate-limit backends
+    redis_url: str = "redis://localhost:6379/0"
+    rate_limits: Dict[str, str] = {}
+    # Number of proxies in front of the app that append to X-Forwarded-For
+    # (1 behind Render's). The client IP is the address the outermost of them
+    # appended; entries to its left are client-supplied and ignored. 0 ignores the header.
+    trusted_proxy_hops: int = 0
+
+    # Admission control for expensive routes: concurrent requests, plus how
+    # many may wait (and for how many seconds) before new ones are shed.
+    aggregation_concurrency: int = 4
+    bulk_concurrency: int = 2
+    admission_queue_size: int = 16
+    admission_queue_timeout: float = 10
+
+    # HTTP caching of GET responses, in seconds: browsers revalidate with the
+    # ETag each time, a CDN may reuse a response for s-maxage seconds.
+    http_cache_max_age: int = 0
+    http_cache_s_maxage: int = 30
+    http_cache_stale_while_revalidate: int = 30
+
+    # In-process columnar analytics snapshot (needs NumPy). Refreshed from
+    # updated_at every refresh interval and checked for deletions every
+    # reconcile interval (seconds); disabled past max rows to bound memory.
+    analytics_snapshot_enabled: bool = False
+    analytics_snapshot_refresh_seconds: float = 5
+    analytics_snapshot_reconcile_seconds: float = 600
+    analytics_snapshot_max_rows: int = 2_000_000
+
+    # Background jobs (POST /jobs): how many run at once, how many may wait,
+    # how long results are kept, and for how long (seconds) an identical
+    # request is handed the finished job instead of starting a new one.
+    # With process workers > 0, CPU-bound formatting runs in a process pool.
+    job_concurrency: int = 2
+    job_queue_size: int = 32
+    job_result_ttl_seconds: float = 600
+    job_reuse_seconds: float = 30
+    job_process_workers: int = 0
+
+    @property
+    def write_concern_w(self):
+        return int(self.mongo_write_concern) if self.mongo_write_concern.isdigit() else self.mongo_write_concern
+
+
+settings = Settings()
@@ -1,35 +1,85 @@
+import asyncio
 import motor.motor_asyncio
-from pymongo.mongo_client import MongoClient
+from pymongo import IndexModel, TEXT, UpdateOne
+from pymongo.errors import OperationFailure
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
 from bson.son import SON
-import os
-from dotenv import load_dotenv
+from app.config import settings
+from app.metrics import MONGO_LISTENERS
 
-load_dotenv()
-MONGO_DETAILS = os.getenv("MONGO_DETAILS")
-DATABASE_NAME = "assessment_db"
+MONGO_DETAILS = settings.mongo_details
+DATABASE_NAME = settings.database_name
 COLLECTION_NAME = "employees"
+DEPARTMENT_STATS_COLLECTION_NAME = "department_stats"
+METADATA_COLLECTION_NAME = "app_metadata"
 
-# Asynchronous Client (for API operations) 
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_DETAILS)
+# Bump whenever EMPLOYEE_INDEXES or employee_validator change so that
+# deployments re-run the setup on their next start.
+SCHEMA_VERSION = 6
+SKIP_SETUP_IF_CURRENT = settings.skip_schema_setup_if_current
+SETUP_RETRY_SECONDS = settings.database_setup_retry_seconds
+SETUP_RETRY_MAX_SECONDS = settings.database_setup_retry_max_seconds
+
+# Server-side time limits (maxTimeMS) passed to every find and aggregate, so a
+# slow query is aborted instead of holding a pooled connection indefinitely.
+QUERY_MAX_TIME_MS = settings.query_max_time_ms
+EXPORT_MAX_TIME_MS = settings.export_max_time_ms
+
+# Asynchronous Client (for API operations)
+# Motor connects lazily, so building the client does not block startup.
+client = motor.motor_asyncio.AsyncIOMotorClient(
+    MONGO_DETAILS,
+    event_listeners=MONGO_LISTENERS,
+    maxPoolSize=settings.mongo_max_pool_size,
+    minPoolSize=settings.mongo_min_pool_size,
+    maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+    waitQueueTimeoutMS=settings.mongo_wait_queue_timeout_ms,
+    serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+    connectTimeoutMS=settings.mongo_connect_timeout_ms,
+    socketTimeoutMS=settings.mongo_socket_timeout_ms,
+    w=settings.write_concern_w,
+    wTimeoutMS=settings.mongo_write_timeout_ms,
+    journal=settings.mongo_journal,
+    compressors=settings.mongo_compressors,
+)
 database = client[DATABASE_NAME]
 employee_collection = database.get_collection(COLLECTION_NAME)
+# Listing, search and analytics may read from secondaries; writes and
+# single-employee reads stay on the primary.
+employee_read_collection = database.get_collection(
+    COLLECTION_NAME,
+    read_preference=make_read_preference(read_pref_mode_from_name(settings.secondary_read_preference), None)
+)
+department_stats_collection = database.get_collection(DEPARTMENT_STATS_COLLECTION_NAME)
+metadata_collection = database.get_collection(METADATA_COLLECTION_NAME)
+
+# Indexes
+EMPLOYEE_INDEXES = [
+    IndexModel("employee_id", unique=True),
+    # Listing (newest first) with and without a department filter. The
+    # trailing salary and employee_id keys let salary ranges be checked on
+    # the index and make summary listings (LIST_SUMMARY_FIELDS) covered.
+    IndexModel([("department", 1), ("joining_date", -1), ("_id", -1), ("salary", 1), ("employee_id", 1)]),
+    IndexModel([("joining_date", -1), ("_id", -1), ("department", 1), ("salary", 1), ("employee_id", 1)]),
+    # Recomputing a department's min/max salary after a removal
+    IndexModel([("department", 1), ("salary", 1)]),
+    # Search: normalized terms for prefix matching, a text index for full-text
+    # search and the raw skills array for exact skill lookups
+    IndexModel("search_terms"),
+    IndexModel(
+        [("name", TEXT), ("skills", TEXT), ("department", TEXT)],
+        weights={"name": 10, "skills": 5, "department": 2},
+        name="employee_text"
+    ),
+    IndexModel("skills"),
+    # Incremental refresh of the analytics snapshot
+    IndexModel("updated_at"),
+]
 
-# Synchronous Client (for startup tasks) 
-print("Initializing synchronous MongoDB client...")
-sync_client = MongoClient(MONGO_DETAILS)
-sync_db = sync_client[DATABASE_NAME] 
-sync_employee_collection = sync_db.get_collection(COLLECTION_NAME)
-print("Synchronous client initialized.")
-
-# Add MongoDB Unique Index 
-print("Attempting to create a unique index on 'employee_id'...")
-try:
-    sync_employee_collection.create_index("employee_id", unique=True)
-    print("Index created successfully or already exists.")
-except Exception as e:
-    print(f"An error occurred while creating the index: {e}")
-
-# Schema Validation 
+# Indexes superseded by wider ones above, dropped during setup
+OBSOLETE_EMPLOYEE_INDEXES = ["department_1_joining_date_-1__id_-1", "joining_date_-1__id_-1"]
+
+# Schema Validation
 employee_validator = {
     "$jsonSchema": {
         "bsonType": "object",
@@ -40,15 +90,106 @@ employee_validator = {
             "department": {"bsonType": "string"},
             "salary": {"bsonType": ["double", "int"], "minimum": 0},
             "joining_date": {"bsonType": "date"},
-            "skills": {"bsonType": "array", "items": {"bsonType": "string"}}
+            "skills": {"bsonType": "array", "items": {"bsonType": "string"}},
+            "version": {"bsonType": ["int", "long"], "minimum": 1},
+            "updated_at": {"bsonType": "date"}
         }
     }
 }
 
-print("Attempting to apply schema validation...")
-try:
-    command = SON([('collMod', COLLECTION_NAME), ('validator', employee_validator)])
-    sync_db.command(command)
-    print("Schema validation applied successfully or already exists.")
-except Exception as e:
-    print(f"An error occurred while applying schema validation: {e}")
+# Startup state reported by /health
+database_state = {"status": "warming", "error": None}
+
+
+async def apply_validator():
+    """Applies the JSON-schema validator, creating the collection if it does not exist yet."""
+    try:
+        await database.command(SON([('collMod', COLLECTION_NAME), ('validator', employee_validator)]))
+    except OperationFailure as e:
+        if e.code != 26:  # NamespaceNotFound
+            raise
+        await database.create_collection(COLLECTION_NAME, validator=employee_validator)
+
+
+async def drop_obsolete_indexes():
+    existing = await employee_collection.index_information()
+    for name in OBSOLETE_EMPLOYEE_INDEXES:
+        if name in existing:
+            await employee_collection.drop_index(name)
+            print(f"Dropped index {name}.")
+
+
+async def backfill_search_terms(batch_size: int = 1000) -> int:
+    """Adds search_terms to employees stored before search indexing existed."""
+    from app.search import search_terms
+
+    updated = 0
+    batch = []
+    cursor = employee_collection.find(
+        {"search_terms": {"$exists": False}}, {"name": 1, "skills": 1, "department": 1},
+        max_time_ms=EXPORT_MAX_TIME_MS
+    )
+    async for employee in cursor:
+        batch.append(UpdateOne({"_id": employee["_id"]}, {"$set": {"search_terms": search_terms(employee)}}))
+        if len(batch) >= batch_size:
+            await employee_collection.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await employee_collection.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    return updated
+
+
+async def init_database(force: bool = False) -> bool:
+    """
+    Creates indexes and applies schema validation. Every step is idempotent;
+    when the stored schema version already matches, the setup is skipped.
+    Returns whether the setup succeeded.
+    """
+    try:
+        stored = await metadata_collection.find_one({"_id": "schema"}, max_time_ms=QUERY_MAX_TIME_MS)
+        if not force and SKIP_SETUP_IF_CURRENT and stored and stored.get("version") == SCHEMA_VERSION:
+            print(f"Schema version {SCHEMA_VERSION} already applied, skipping setup.")
+        else:
+            print("Attempting to create indexes on the employee collection...")
+            await employee_collection.create_indexes(EMPLOYEE_INDEXES)
+            print("Indexes created successfully or already exist.")
+            await drop_obsolete_indexes()
+
+            print("Attempting to apply schema validation...")
+            await apply_validator()
+            print("Schema validation applied successfully or already exists.")
+
+            print("Backfilling search terms...")
+            print(f"Search terms added to {await backfill_search_terms()} employees.")
+
+            result = await employee_collection.update_many(
+                {"version": {"$exists": False}}, {"$set": {"version": 1}}
+            )
+            print(f"Version field added to {result.modified_count} employees.")
+
+            # Employees written before updated_at existed count as modified now.
+            result = await employee_collection.update_many(
+                {"updated_at": {"$exists": False}}, {"$currentDate": {"updated_at": True}}
+            )
+            print(f"Updated-at field added to {result.modified_count} employees.")
+
+            await metadata_collection.update_one(
+                {"_id": "schema"}, {"$set": {"version": SCHEMA_VERSION}}, upsert=True
+            )
+        database_state.update(status="ok", error=None)
+        return True
+    except Exception as e:
+        print(f"An error occurred while setting up the database: {e}")
+        database_state.update(status="error", error=str(e))
+        return False
+
+
+async def setup_database():
+    """Runs init_database until it succeeds, backing off exponentially between attempts."""
+    delay = SETUP_RETRY_SECONDS
+    while not await init_database():
+        print(f"Retrying database setup in {delay:g}s.")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, SETUP_RETRY_MAX_SECONDS)
@@ -0,0 +1,240 @@
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional, Tuple
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
+from app.database import employee_collection, department_stats_collection, DEPARTMENT_STATS_COLLECTION_NAME
+from app.database import QUERY_MAX_TIME_MS, EXPORT_MAX_TIME_MS
+
+# Each department_stats document is keyed by department name and holds
+# count, sum, min, max and sum_sq of salaries. count/sum/sum_sq are moved with
+# $inc so concurrent writers never lose updates; min/max use $min/$max on the
+# way in and are recomputed from the (department, salary) index when a
+# boundary value leaves the bucket. That recomputation is only written if
+# count, sum and sum_sq are unchanged since it started, so a concurrent write
+# (whose $min/$max it might otherwise overwrite) makes it retry instead.
+BOUNDS_ATTEMPTS = 5
+
+
+def _salary_delta(salary: float, sign: int) -> dict:
+    return {"count": sign, "sum": sign * salary, "sum_sq": sign * salary * salary}
+
+
+async def record_insert(employee: dict):
+    """Adds one stored employee document to its department bucket."""
+    salary = employee["salary"]
+    await department_stats_collection.update_one(
+        {"_id": employee["department"]},
+        {
+            "$inc": _salary_delta(salary, 1),
+            "$min": {"min": salary},
+            "$max": {"max": salary},
+            "$currentDate": {"updated_at": True},
+        },
+        upsert=True
+    )
+
+
+async def record_inserts(employees: List[dict]):
+    """Adds many stored employee documents with one write per department."""
+    buckets = defaultdict(lambda: {"count": 0, "sum": 0.0, "sum_sq": 0.0, "min": math.inf, "max": -math.inf})
+    for employee in employees:
+        bucket = buckets[employee["department"]]
+        salary = employee["salary"]
+        for field, value in _salary_delta(salary, 1).items():
+            bucket[field] += value
+        bucket["min"] = min(bucket["min"], salary)
+        bucket["max"] = max(bucket["max"], salary)
+
+    if not buckets:
+        return
+
+    await department_stats_collection.bulk_write([
+        UpdateOne(
+            {"_id": department},
+            {
+                "$inc": {"count": b["count"], "sum": b["sum"], "sum_sq": b["sum_sq"]},
+                "$min": {"min": b["min"]},
+                "$max": {"max": b["max"]},
+                "$currentDate": {"updated_at": True},
+            },
+            upsert=True
+        )
+        for department, b in buckets.items()
+    ], ordered=False)
+
+
+async def record_delete(employee: dict):
+    """Removes one employee document (as it was before the write) from its department bucket."""
+    department = employee["department"]
+    salary = employee["salary"]
+    stats = await department_stats_collection.find_one_and_update(
+        {"_id": department},
+        {"$inc": _salary_delta(salary, -1), "$currentDate": {"updated_at": True}},
+        return_document=ReturnDocument.AFTER
+    )
+    if stats is None:
+        return
+
+    if stats["count"] <= 0:
+        await department_stats_collection.delete_one({"_id": department, "count": {"$lte": 0}})
+    elif salary <= stats["min"] or salary >= stats["max"]:
+        await _refresh_bounds(department)
+
+
+async def record_update(previous: dict, updated: dict):
+    """Moves an employee between buckets when their department or salary changed."""
+    if previous["department"] != updated["department"]:
+        await record_insert(updated)
+        await record_delete(previous)
+        return
+
+    old_salary = previous["salary"]
+    new_salary = updated["salary"]
+    if old_salary == new_salary:
+        return
+    # Same bucket: one write moves sum and sum_sq, and count is unchanged.
+    stats = await department_stats_collection.find_one_and_update(
+        {"_id": updated["department"]},
+        {
+            "$inc": {"sum": new_salary - old_salary, "sum_sq": new_salary * new_salary - old_salary * old_salary},
+            "$min": {"min": new_salary},
+            "$max": {"max": new_salary},
+            "$currentDate": {"updated_at": True},
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    if stats is None:
+        await refresh_departments([updated["department"]])
+    elif old_salary <= stats["min"] or old_salary >= stats["max"]:
+        await _refresh_bounds(updated["department"])
+
+
+async def _refresh_bounds(department: str):
+    for _ in range(BOUNDS_ATTEMPTS):
+        stats = await department_stats_collection.find_one(
+            {"_id": department}, {"count": 1, "sum": 1, "sum_sq": 1}, max_time_ms=QUERY_MAX_TIME_MS
+        )
+        if stats is None:
+            return
+        lowest = await employee_collection.find_one(
+            {"department": department}, {"salary": 1}, sort=[("salary", 1)], max_time_ms=QUERY_MAX_TIME_MS
+        )
+        highest = await employee_collection.find_one(
+            {"department": department}, {"salary": 1}, sort=[("salary", -1)], max_time_ms=QUERY_MAX_TIME_MS
+        )
+        unchanged = {"_id": department, **{field: stats[field] for field in ("count", "sum", "sum_sq")}}
+        if lowest is None:
+            result = await department_stats_collection.delete_one(unchanged)
+            done = result.deleted_count
+        else:
+            result = await department_stats_collection.update_one(
+                unchanged,
+                {"$set": {"min": lowest["salary"], "max": highest["salary"]}, "$currentDate": {"updated_at": True}}
+            )
+            done = result.matched_count
+        if done:
+            return
+    print(f"Salary bounds of {department} kept changing; recomputing the bucket.")
+    await refresh_departments([department])
+
+
+def stats_helper(stats: dict) -> dict:
+    """Turns a department_stats document into the report row returned by the API."""
+    count = stats["count"]
+    mean = stats["sum"] / count
+    variance = max(stats["sum_sq"] / count - mean * mean, 0.0)
+    return {
+        "department": stats["_id"],
+        "avg_salary": mean,
+        "headcount": count,
+        "min_salary": stats["min"],
+        "max_salary": stats["max"],
+        "stddev_salary": math.sqrt(variance),
+    }
+
+
+async def read_department_stats() -> Tuple[List[dict], Optional[datetime]]:
+    """Reads the materialized stats, one row per department, and when any of them last changed."""
+    cursor = department_stats_collection.find({"count": {"$gt": 0}}, max_time_ms=QUERY_MAX_TIME_MS).sort("_id", 1)
+    documents = [stats async for stats in cursor]
+    last_modified = max((stats["updated_at"] for stats in documents if "updated_at" in stats), default=None)
+    return [stats_helper(stats) for stats in documents], last_modified
+
+
+LIVE_STATS_PIPELINE = [
+    {
+        "$group": {
+            "_id": "$department",
+            "count": {"$sum": 1},
+            "sum": {"$sum": "$salary"},
+            "sum_sq": {"$sum": {"$multiply": ["$salary", "$salary"]}},
+            "min": {"$min": "$salary"},
+            "max": {"$max": "$salary"},
+        }
+    }
+]
+
+
+async def rebuild_department_stats() -> int:
+    """Recomputes every bucket from the employee collection and replaces department_stats."""
+    pipeline = LIVE_STATS_PIPELINE + [
+        {"$set": {"updated_at": "$$NOW"}},
+        {"$out": DEPARTMENT_STATS_COLLECTION_NAME},
+    ]
+    async for _ in employee_collection.aggregate(pipeline, maxTimeMS=EXPORT_MAX_TIME_MS):
+        pass
+    return await department_stats_collection.count_documents({})
+
+
+async def refresh_departments(departments) -> int:
+    """
+    Recomputes the buckets of the given departments from the employee
+    collection, for writes that touch too many employees to move one by one.
+    """
+    departments = [department for department in set(departments) if department is not None]
+    if not departments:
+        return 0
+    pipeline = [{"$match": {"department": {"$in": departments}}}] + LIVE_STATS_PIPELINE + [
+        {"$set": {"updated_at": "$$NOW"}}
+    ]
+    live = [doc async for doc in employee_collection.aggregate(pipeline, maxTimeMS=EXPORT_MAX_TIME_MS)]
+
+    requests = [
+        ReplaceOne({"_id": stats["_id"]}, stats, upsert=True)
+        for stats in live
+    ]
+    emptied = set(departments) - {stats["_id"] for stats in live}
+    requests.extend(DeleteOne({"_id": department}) for department in emptied)
+    await department_stats_collection.bulk_write(requests, ordered=False)
+    return len(live)
+
+
+async def check_department_stats(tolerance: float = 1e-6) -> dict:
+    """Compares the materialized stats with a live aggregation over the employee collection."""
+    live = {
+        doc["_id"]: doc
+        async for doc in employee_collection.aggregate(LIVE_STATS_PIPELINE, maxTimeMS=EXPORT_MAX_TIME_MS)
+    }
+    stored = {
+        doc["_id"]: doc
+        async for doc in department_stats_collection.find({"count": {"$gt": 0}}, max_time_ms=QUERY_MAX_TIME_MS)
+    }
+
+    mismatches = []
+    for department in sorted(set(live) | set(stored), key=str):
+        expected = live.get(department)
+        actual = stored.get(department)
+        if expected is None or actual is None:
+            mismatches.append({"department": department, "expected": expected, "actual": actual})
+            continue
+        for field in ("count", "sum", "sum_sq", "min", "max"):
+            if not math.isclose(expected[field], actual[field], rel_tol=tolerance, abs_tol=tolerance):
+                mismatches.append({
+                    "department": department,
+                    "field": field,
+                    "expected": expected[field],
+                    "actual": actual[field],
+                })
+
+    return {"consistent": not mismatches, "departments": len(live), "mismatches": mismatches}
@@ -0,0 +1,126 @@
+import asyncio
+import uuid
+from collections import deque
+from typing import List, Optional, Tuple
+from pymongo.errors import OperationFailure, PyMongoError
+from app.database import employee_collection
+from app.models import employee_helper
+
+# Employee change feed shared by every subscriber of /employees/events.
+#
+# When MongoDB supports change streams (replica sets, Atlas), a single watcher
+# task follows the collection and publishes every insert/update/delete; it
+# keeps the stream's resume token so it can reconnect without losing changes.
+# On a standalone server the write handlers publish their own changes instead.
+#
+# Subscribers see ids of the form "<hub instance>-<sequence>". Reconnecting
+# with the last seen id replays the buffered events after it; if the id comes
+# from another process or has fallen out of the buffer, a "reset" is sent so
+# the client reloads its data.
+EVENT_HISTORY_SIZE = 1000
+SUBSCRIBER_QUEUE_SIZE = 1000
+CHANGE_STREAM_NOT_SUPPORTED = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class EventHub:
+    def __init__(self, history_size: int = EVENT_HISTORY_SIZE):
+        self.instance = uuid.uuid4().hex[:8]
+        self.mode = "local"
+        self.resume_token = None
+        self._sequence = 0
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.instance}-{self._sequence}"
+
+    def publish(self, event: dict):
+        self._sequence += 1
+        entry = (self.last_event_id, event)
+        self._history.append(entry)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(entry)
+            except asyncio.QueueFull:
+                # A subscriber that cannot keep up is told to reload instead.
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def publish_local(self, event: dict):
+        """Publishes a change made by this process, unless a change stream already delivers it."""
+        if self.mode == "local":
+            self.publish(event)
+
+    def events_after(self, last_event_id: Optional[str]) -> Optional[List[Tuple[str, dict]]]:
+        """Buffered events after the given id, or None when they cannot be replayed."""
+        if last_event_id is None:
+            return []
+        instance, _, sequence = last_event_id.rpartition("-")
+        if instance != self.instance or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+        if sequence > self._sequence:
+            return None
+        oldest = self._sequence - len(self._history) + 1
+        if sequence + 1 < oldest:
+            return None
+        return list(self._history)[sequence + 1 - oldest:]
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+
+def change_event(operation: str, employee: Optional[dict] = None, object_id=None) -> dict:
+    """Builds the event sent to clients; deletes only carry the document id."""
+    return {
+        "op": operation,
+        "id": str(employee["_id"] if employee else object_id),
+        "employee": employee_helper(employee) if employee else None,
+    }
+
+
+hub = EventHub()
+
+
+async def watch_employee_changes():
+    """Follows the employee collection's change stream, falling back to local events if unsupported."""
+    while True:
+        try:
+            async with employee_collection.watch(
+                full_document="updateLookup", resume_after=hub.resume_token
+            ) as stream:
+                hub.mode = "change_stream"
+                print("Employee change stream opened.")
+                async for change in stream:
+                    hub.resume_token = stream.resume_token
+                    operation = change["operationType"]
+                    if operation in ("insert", "update", "replace") and change.get("fullDocument"):
+                        hub.publish(change_event(
+                            "insert" if operation == "insert" else "update", change["fullDocument"]
+                        ))
+                    elif operation == "delete":
+                        hub.publish(change_event("delete", object_id=change["documentKey"]["_id"]))
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_NOT_SUPPORTED:
+                print("Change streams are not available; publishing changes made by this process only.")
+                hub.mode = "local"
+                return
+            if e.code == CHANGE_STREAM_HISTORY_LOST:
+                # The oplog no longer covers our resume token, so subscribers must reload.
+                hub.resume_token = None
+                hub.publish({"op": "reset", "id": None, "employee": None})
+            print(f"Employee change stream failed, reopening: {e}")
+            await asyncio.sleep(1)
+        except PyMongoError as e:
+            # Resuming from the stored token replays anything missed meanwhile.
+            print(f"Employee change stream interrupted, resuming: {e}")
+            await asyncio.sleep(1)
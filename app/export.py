@@ -0,0 +1,35 @@
+import csv
+import io
+import json
+from typing import List
+
+# Formatting of employee exports. This module imports nothing from the app so
+# the job runner can hand render_export_rows to a process pool cheaply.
+
+EXPORT_BATCH_SIZE = 5000
+EXPORT_FIELDS = ["employee_id", "name", "department", "salary", "joining_date", "skills", "version", "updated_at"]
+EXPORT_PROJECTION = {field: 1 for field in EXPORT_FIELDS}
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_header(export_format: str) -> str:
+    """The CSV header row; NDJSON has none."""
+    if export_format != "csv":
+        return ""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(["id", *EXPORT_FIELDS])
+    return buffer.getvalue()
+
+
+def render_export_rows(records: List[dict], export_format: str) -> str:
+    """Serializes employee_helper records as CSV rows or NDJSON lines."""
+    buffer = io.StringIO()
+    if export_format == "csv":
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow({**record, "skills": ";".join(record["skills"])}.values())
+    else:
+        for record in records:
+            buffer.write(json.dumps(record))
+            buffer.write("\n")
+    return buffer.getvalue()
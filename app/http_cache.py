@@ -0,0 +1,82 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+from fastapi import Request, Response
+from app.config import settings
+from app.responses import FastJSONResponse
+
+# Conditional GET support. Validators are computed from document ids,
+# versions and timestamps, never from the rendered body, so a request whose
+# If-None-Match still matches is answered with 304 before anything is
+# serialized.
+
+
+def cache_control() -> str:
+    """Browsers revalidate every time (cheap with 304s); a CDN may serve a copy for s-maxage seconds."""
+    return (
+        f"public, max-age={settings.http_cache_max_age}, s-maxage={settings.http_cache_s_maxage}, "
+        f"stale-while-revalidate={settings.http_cache_stale_while_revalidate}"
+    )
+
+
+def make_etag(*parts) -> str:
+    """A strong ETag derived from the given parts."""
+    digest = hashlib.sha1("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def employee_etag(employee: dict) -> str:
+    """Changes whenever the employee is rewritten (version) or deleted and recreated (id)."""
+    return f'"{employee["id"]}.{employee["version"]}"'
+
+
+def page_etag(employees: Iterable[dict], *extra) -> str:
+    return make_etag(*(f"{employee['id']}.{employee['version']}" for employee in employees), *extra)
+
+
+def latest(timestamps: Iterable[Optional[datetime]]) -> Optional[datetime]:
+    return max((timestamp for timestamp in timestamps if timestamp is not None), default=None)
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    # MongoDB hands back naive datetimes that are already in UTC.
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluates If-None-Match, or If-Modified-Since when no If-None-Match was sent (RFC 9110)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison: W/"x" matches "x".
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control()}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def conditional_response(request: Request, content, etag: str, last_modified: Optional[datetime] = None,
+                         headers: Optional[dict] = None) -> Response:
+    """Returns 304 when the client's copy is current, otherwise the JSON body with validators."""
+    headers = {**validator_headers(etag, last_modified), **(headers or {})}
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content, headers=headers)
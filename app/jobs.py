@@ -0,0 +1,178 @@
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException, status
+from app.config import settings
+from app.metrics import background_jobs
+
+# In-process runner for reports and exports that are too slow for a request.
+#
+# A job is submitted with a kind and its parameters and runs as an asyncio
+# task once one of `concurrency` slots is free. Identical submissions (same
+# kind and parameters) share the job that is queued, running or finished
+# within `reuse_seconds`. Finished jobs keep their result for `result_ttl`
+# seconds. Jobs live in this process only, so with several workers a client
+# must poll the worker that accepted the job (Render runs a single one).
+#
+# Handlers are coroutines `handler(job, params) -> (content, media_type)` and
+# may update job.progress (0 to 1). Large results should be spooled to a
+# temporary file and returned as a Path; the runner deletes the file when the
+# job expires or the app shuts down. CPU-bound work goes through run_cpu(),
+# which uses a process pool when job_process_workers > 0 and the default
+# thread pool otherwise.
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+Handler = Callable[["Job", dict], Awaitable[tuple]]
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    key: str
+    status: str = QUEUED
+    progress: float = 0.0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Any = None
+    media_type: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def view(self) -> dict:
+        """The job as reported by GET /jobs/{id}; the result itself is downloaded separately."""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result_url": f"/jobs/{self.id}/result" if self.status == SUCCEEDED else None,
+        }
+
+
+class JobRunner:
+    def __init__(self, concurrency: int = settings.job_concurrency, queue_size: int = settings.job_queue_size,
+                 result_ttl: float = settings.job_result_ttl_seconds, reuse_seconds: float = settings.job_reuse_seconds,
+                 process_workers: int = settings.job_process_workers):
+        self.queue_size = queue_size
+        self.result_ttl = result_ttl
+        self.reuse_seconds = reuse_seconds
+        self.process_workers = process_workers
+        self._slots = asyncio.Semaphore(concurrency)
+        self._handlers: Dict[str, Handler] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self):
+        return sorted(self._handlers)
+
+    @staticmethod
+    def _discard_result(job: Job):
+        if isinstance(job.result, Path):
+            job.result.unlink(missing_ok=True)
+        job.result = None
+
+    def _purge(self):
+        """Drops finished jobs whose results have expired."""
+        now = time.time()
+        for job in [job for job in self._jobs.values() if job.finished and now - job.finished_at > self.result_ttl]:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+            self._discard_result(job)
+        self._report()
+
+    def _report(self):
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        for job_status, count in counts.items():
+            background_jobs.set(count, job_status)
+
+    def submit(self, kind: str, params: dict) -> Job:
+        """Starts a job, or returns the identical one already queued, running or just finished."""
+        self._purge()
+        key = f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+        existing = self._jobs.get(self._by_key.get(key))
+        if existing and existing.status != FAILED and (
+            not existing.finished or time.time() - existing.finished_at <= self.reuse_seconds
+        ):
+            return existing
+
+        if sum(job.status == QUEUED for job in self._jobs.values()) >= self.queue_size:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many jobs are waiting, please retry shortly.",
+                headers={"Retry-After": "5"},
+            )
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, params=params, key=key)
+        self._jobs[job.id] = job
+        self._by_key[key] = job.id
+        self._tasks[job.id] = asyncio.create_task(self._run(job, self._handlers[kind]))
+        self._report()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge()
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: Job, handler: Handler):
+        try:
+            async with self._slots:
+                job.status = RUNNING
+                job.started_at = time.time()
+                self._report()
+                job.result, job.media_type = await handler(job, job.params)
+                job.progress = 1.0
+                job.status = SUCCEEDED
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) failed: {e}")
+            job.status = FAILED
+            job.error = str(e) or type(e).__name__
+        finally:
+            job.finished_at = time.time()
+            self._tasks.pop(job.id, None)
+            self._report()
+
+    async def run_cpu(self, func, *args):
+        """Runs a picklable function in the process pool, or in a thread when none is configured."""
+        if self.process_workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(self.process_workers)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def shutdown(self):
+        for task in self._tasks.values():
+            task.cancel()
+        for job in self._jobs.values():
+            self._discard_result(job)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+jobs = JobRunner()
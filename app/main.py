@@ -1,14 +1,64 @@
 from fastapi import APIRouter, HTTPException, status, Query, Depends
 from app.auth import get_current_user
 from fastapi import FastAPI, HTTPException
-from app.database import database
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
+from pymongo.errors import ExecutionTimeout
+import asyncio
+from app.database import client, database, database_state, setup_database
+from app.config import settings
+from app.cache import cache
+from app.events import watch_employee_changes
+from app.analytics_snapshot import snapshot
+from app.jobs import jobs
+from app.metrics import MetricsMiddleware, render_metrics
+from app.rate_limit import rate_limit
+from app.responses import FastJSONResponse
 from app.routers.employee import router as employee_route
 from app.routers.auth import router as auth_router
+from app.routers.jobs import router as jobs_router
 
-app = FastAPI(title="Employee Management API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Index and validator setup runs in the background so the first request
+    # is served immediately; /health reports "warming" until it finishes and
+    # "error" while a failed attempt waits to be retried.
+    setup_task = asyncio.create_task(setup_database())
+    # Feeds /employees/events from the collection's change stream.
+    watch_task = asyncio.create_task(watch_employee_changes())
+    tasks = [setup_task, watch_task]
+    if snapshot is not None:
+        # Loads the columnar analytics snapshot and keeps it refreshed.
+        tasks.append(asyncio.create_task(snapshot.run()))
+    yield
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    jobs.shutdown()
+    client.close()
+
+
+app = FastAPI(title="Employee Management API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(ExecutionTimeout)
+async def query_timeout_handler(request, exc):
+    """A query ran past QUERY_MAX_TIME_MS and was aborted by the server."""
+    return FastJSONResponse(
+        status_code=503,
+        content={"detail": "The database query took too long and was cancelled; try a narrower request."},
+        headers={"Retry-After": "1"}
+    )
 
 app.include_router(auth_router, tags=["Authentication"])
-app.include_router(employee_route, tags=["Employees"], prefix="/employees")
+app.include_router(
+    employee_route, tags=["Employees"], prefix="/employees", dependencies=[Depends(rate_limit("default"))]
+)
+app.include_router(jobs_router, tags=["Jobs"], prefix="/jobs", dependencies=[Depends(rate_limit("default"))])
 
 @app.get("/", tags=["Root"])
 async def read_root():
@@ -17,9 +67,25 @@ async def read_root():
 
 @app.get("/health", tags=["Health Check"])
 async def health_check():
-    """Checks the connection to the database."""
+    """Checks the connection to the database and whether startup setup has finished."""
+    if database_state["status"] == "warming":
+        return {"status": "warming", "message": "Database setup is still running."}
+    if database_state["status"] == "error":
+        raise HTTPException(status_code=503, detail=f"Database setup failed: {database_state['error']}")
     try:
         await database.command('ping')
         return {"status": "ok", "message": "Successfully connected to the database."}
     except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Database connection failed: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=503, detail=f"Database connection failed: {e}")
+
+
+@app.get("/cache/stats", tags=["Health Check"])
+async def cache_stats():
+    """Reports hit, miss and eviction counters of the read-through cache."""
+    return cache.stats()
+
+
+@app.get("/metrics", tags=["Health Check"], response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: request counts and latency, MongoDB command and pool stats, cache and auth timings."""
+    return PlainTextResponse(render_metrics(cache.stats()), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,255 @@
+import threading
+import time
+from bisect import bisect_left
+from pymongo import monitoring
+from app.config import settings
+
+# Minimal Prometheus-style metrics: counters, gauges and histograms with
+# labels, rendered in the text exposition format served at /metrics.
+# Everything here is in-process and lock-protected because pymongo calls its
+# monitoring listeners from Motor's worker threads.
+
+SLOW_QUERY_MS = settings.slow_query_ms
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+CPU_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=REQUEST_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, seconds: float, *label_values):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += seconds
+            state[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(
+                (labels, ([*counts], total, count)) for labels, (counts, total, count) in self._values.items()
+            )
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                names = (*self.labels, "le")
+                lines.append(f"{self.name}_bucket{_format_labels(names, (*label_values, bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+# HTTP
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by route handler and status.", ("method", "handler", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route handler.", ("method", "handler")
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+
+# MongoDB
+mongodb_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency.", ("command",), DB_BUCKETS
+)
+mongodb_command_failures = Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands.", ("command",)
+)
+mongodb_pool_connections = Gauge(
+    "mongodb_pool_connections", "Open connections per MongoDB server.", ("address",)
+)
+mongodb_pool_checked_out = Gauge(
+    "mongodb_pool_checked_out_connections", "Connections currently checked out per MongoDB server.", ("address",)
+)
+
+# Auth
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds", "bcrypt hashing and verification time.", ("operation",), CPU_BUCKETS
+)
+jwt_decode_duration = Histogram(
+    "jwt_decode_duration_seconds", "Bearer token verification time.", ("cached",), CPU_BUCKETS
+)
+
+# Rate limiting and admission control
+rate_limit_rejections = Counter(
+    "rate_limit_rejections_total", "Requests rejected by rate limits or concurrency caps.", ("limit", "reason")
+)
+admission_queue_depth = Gauge(
+    "admission_queue_depth", "Requests waiting for a concurrency slot.", ("limit",)
+)
+
+# Analytics snapshot
+analytics_snapshot_rows = Gauge("analytics_snapshot_rows", "Live employees held by the analytics snapshot.")
+analytics_snapshot_bytes = Gauge("analytics_snapshot_bytes", "Memory used by the analytics snapshot arrays.")
+
+# Background jobs
+background_jobs = Gauge("background_jobs", "Background jobs held by the job runner.", ("status",))
+
+# Cache (filled in from cache.stats() when /metrics is scraped)
+cache_events = Gauge("cache_events", "Read-through cache counters.", ("event",))
+cache_entries = Gauge("cache_entries", "Entries held by the read-through cache.")
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command and logs the ones slower than SLOW_QUERY_MS."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        seconds = event.duration_micros / 1e6
+        mongodb_command_duration.observe(seconds, event.command_name)
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            print(f"Slow MongoDB command: {event.command_name} on {event.database_name} "
+                  f"took {seconds * 1000:.0f} ms (request {event.request_id})")
+
+    def failed(self, event):
+        mongodb_command_duration.observe(event.duration_micros / 1e6, event.command_name)
+        mongodb_command_failures.inc(event.command_name)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Tracks open and checked-out connections per server."""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongodb_pool_connections.inc("%s:%s" % event.address)
+
+    def connection_closed(self, event):
+        mongodb_pool_connections.dec("%s:%s" % event.address)
+
+    def connection_checked_out(self, event):
+        mongodb_pool_checked_out.inc("%s:%s" % event.address)
+
+    def connection_checked_in(self, event):
+        mongodb_pool_checked_out.dec("%s:%s" % event.address)
+
+
+MONGO_LISTENERS = [CommandMetrics(), PoolMetrics()] if settings.metrics_enabled else []
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route counts, latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        http_requests_in_flight.inc()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec()
+            # Labelling by handler name keeps cardinality bounded (no raw IDs in paths).
+            endpoint = scope.get("endpoint")
+            handler = endpoint.__name__ if endpoint is not None else "unmatched"
+            http_request_duration.observe(time.perf_counter() - started, scope["method"], handler)
+            http_requests_total.inc(scope["method"], handler, status_code)
+
+
+def render_metrics(cache_stats: dict = None) -> str:
+    if cache_stats:
+        for event in ("hits", "misses", "evictions"):
+            if event in cache_stats:
+                cache_events.set(cache_stats[event], event)
+        if "entries" in cache_stats:
+            cache_entries.set(cache_stats["entries"])
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
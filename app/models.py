@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
 from datetime import date
+from app.analytics import DEFAULT_SALARY_BAND, MIN_SALARY_BAND
 
 class EmployeeSchema(BaseModel):
     employee_id: str = Field(..., description="Unique identifier for the employee")
@@ -37,6 +38,126 @@ class UpdateEmployeeSchema(BaseModel):
             }
         }
 
+class EmployeeOut(BaseModel):
+    id: str
+    employee_id: str
+    name: str
+    department: str
+    salary: float
+    joining_date: str
+    skills: List[str]
+    version: int
+    updated_at: Optional[str] = None
+
+class EmployeeSearchResult(EmployeeOut):
+    score: Optional[float] = None
+
+class EmployeeSummary(BaseModel):
+    id: str
+    employee_id: str
+    department: str
+    salary: float
+    joining_date: str
+
+class EmployeePage(BaseModel):
+    items: List[EmployeeOut]
+    next_cursor: Optional[str] = None
+
+class EmployeeSummaryPage(BaseModel):
+    items: List[EmployeeSummary]
+    next_cursor: Optional[str] = None
+
+class BatchGetResult(BaseModel):
+    items: List[EmployeeOut]
+    missing: List[str]
+
+class BatchGetSchema(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=1000, description="Employee IDs to fetch")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids": ["E456", "E123"]
+            }
+        }
+
+class EmployeeFilterSchema(BaseModel):
+    employee_ids: Optional[List[str]] = Field(None, min_length=1, description="Only these employee IDs")
+    department: Optional[str] = Field(None, description="Only employees in this department")
+    skills: Optional[List[str]] = Field(None, min_length=1, description="Only employees with all of these skills")
+    joined_after: Optional[date] = Field(None, description="Only employees who joined on or after this date")
+    joined_before: Optional[date] = Field(None, description="Only employees who joined on or before this date")
+    min_salary: Optional[float] = Field(None, ge=0, description="Only employees earning at least this much")
+    max_salary: Optional[float] = Field(None, ge=0, description="Only employees earning at most this much")
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # An empty filter would match every employee; that is never what a payroll change means.
+        if not self.model_dump(exclude_none=True):
+            raise ValueError("The filter needs at least one criterion.")
+        return self
+
+class BulkUpdateSchema(BaseModel):
+    filter: EmployeeFilterSchema
+    set: Optional[UpdateEmployeeSchema] = Field(None, description="Fields to set on every matching employee")
+    salary_percent: Optional[float] = Field(None, gt=-100, description="Change salaries by this percentage, e.g. 5 for a 5% raise")
+    salary_increment: Optional[float] = Field(None, description="Add this amount to salaries (negative to reduce)")
+
+    @model_validator(mode="after")
+    def check_changes(self):
+        changes = self.set.model_dump(exclude_none=True) if self.set else {}
+        salary_changes = [
+            change for change in (changes.get("salary"), self.salary_percent, self.salary_increment)
+            if change is not None
+        ]
+        if len(salary_changes) > 1:
+            raise ValueError("Use only one of set.salary, salary_percent and salary_increment.")
+        if not changes and not salary_changes:
+            raise ValueError("Nothing to change: provide set, salary_percent or salary_increment.")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "filter": {"department": "Engineering"},
+                "salary_percent": 5
+            }
+        }
+
+class BulkDeleteSchema(BaseModel):
+    filter: EmployeeFilterSchema
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "filter": {"department": "Berlin Office"}
+            }
+        }
+
+class AnalyticsJobParams(BaseModel):
+    department: Optional[str] = None
+    joined_after: Optional[date] = None
+    joined_before: Optional[date] = None
+    interval: str = Field("month", pattern="^(month|year)$")
+    top_skills: int = Field(10, gt=0, le=100)
+    salary_band: float = Field(DEFAULT_SALARY_BAND, ge=MIN_SALARY_BAND)
+
+class ExportJobParams(BaseModel):
+    format: str = Field("ndjson", pattern="^(ndjson|csv)$")
+    department: Optional[str] = None
+
+class JobSchema(BaseModel):
+    kind: Literal["analytics", "export"] = Field(..., description="analytics: the /employees/analytics report; export: an NDJSON or CSV file")
+    params: dict = Field({}, description="Parameters of the report or export")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "kind": "analytics",
+                "params": {"department": "Engineering", "interval": "year"}
+            }
+        }
+
 def employee_helper(employee) -> dict:
     """It Transforms a database record (BSON) into a Python dictionary."""
     return {
@@ -47,4 +168,16 @@ def employee_helper(employee) -> dict:
         "salary": employee["salary"],
         "joining_date": str(employee["joining_date"]),
         "skills": employee["skills"],
-    }
\ No newline at end of file
+        "version": employee.get("version", 1),
+        "updated_at": employee["updated_at"].isoformat() if employee.get("updated_at") else None,
+    }
+
+def summary_helper(employee) -> dict:
+    """Transforms a document projected to LIST_SUMMARY_FIELDS (all indexed) into a summary row."""
+    return {
+        "id": str(employee["_id"]),
+        "employee_id": employee["employee_id"],
+        "department": employee["department"],
+        "salary": employee["salary"],
+        "joining_date": str(employee["joining_date"]),
+    }
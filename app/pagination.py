@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Keyset pagination walks employees newest first on (joining_date, _id).
+# The compound indexes created in app/database.py serve this sort order.
+KEYSET_SORT = [("joining_date", -1), ("_id", -1)]
+
+
+def encode_cursor(employee: dict) -> str:
+    """Builds an opaque cursor pointing just after the given employee document."""
+    payload = {"d": employee["joining_date"].isoformat(), "i": str(employee["_id"])}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Turns an opaque cursor back into its (joining_date, _id) position. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(payload["d"]), ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError("Invalid pagination cursor.") from e
+
+
+def keyset_filter(cursor: str) -> dict:
+    """Returns the query predicate selecting documents that sort after the cursor position."""
+    joining_date, object_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"joining_date": {"$lt": joining_date}},
+            {"joining_date": joining_date, "_id": {"$lt": object_id}},
+        ]
+    }
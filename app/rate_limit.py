@@ -0,0 +1,201 @@
+import asyncio
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request, status
+from app.auth import decode_token
+from app.config import settings
+from app.metrics import admission_queue_depth, rate_limit_rejections
+
+# Token-bucket rate limits keyed on the caller: the JWT subject when the
+# request carries a valid bearer token, otherwise the client IP. Each limit
+# reads "<requests>/<second|minute|hour>"; the bucket holds that many tokens
+# and refills continuously, so short bursts are allowed up to the full count.
+DEFAULT_RATE_LIMITS = {
+    "default": "300/minute",
+    "login": "10/minute",
+    "search": "120/minute",
+    "avg_salary": "60/minute",
+    "analytics": "20/minute",
+    "export": "5/minute",
+    "bulk": "10/minute",
+    "stats_admin": "5/minute",
+    "jobs": "20/minute",
+}
+RATE_LIMITS = {**DEFAULT_RATE_LIMITS, **settings.rate_limits}
+
+PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600}
+MEMORY_STORE_MAX_BUCKETS = 100_000
+
+
+def parse_limit(limit: str):
+    """Turns "10/minute" into (capacity, tokens refilled per second)."""
+    count, _, period = limit.partition("/")
+    if period not in PERIOD_SECONDS:
+        raise ValueError(f"Unknown rate limit period in {limit!r}; use second, minute or hour.")
+    capacity = int(count)
+    return capacity, capacity / PERIOD_SECONDS[period]
+
+
+class MemoryBucketStore:
+    """Buckets held by this process; the least recently used ones are dropped past the size bound."""
+
+    def __init__(self, max_buckets: int = MEMORY_STORE_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        """Takes `cost` tokens and returns 0, or returns the seconds until they will be available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def clear(self):
+        self._buckets.clear()
+
+
+# Refill and take in one atomic step so concurrent workers never double-spend.
+_REDIS_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisBucketStore:
+    """Redis-compatible backend so every API worker shares the same buckets."""
+
+    def __init__(self, url: str = settings.redis_url, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._take = self._redis.register_script(_REDIS_TAKE_SCRIPT)
+        self.prefix = prefix
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        return float(await self._take(keys=[self.prefix + key], args=[capacity, rate, cost]))
+
+    async def clear(self):
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+
+def create_bucket_store():
+    if settings.rate_limit_backend == "redis":
+        print(f"Using Redis rate limit store at {settings.redis_url}")
+        return RedisBucketStore()
+    return MemoryBucketStore()
+
+
+bucket_store = create_bucket_store()
+
+
+def client_identity(request: Request) -> str:
+    """The JWT subject for authenticated callers, otherwise the client IP."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"user:{decode_token(token)}"
+        except HTTPException:
+            pass  # Invalid tokens are rejected by get_current_user; limit them by IP here.
+    hops = settings.trusted_proxy_hops
+    if hops > 0:
+        # Each trusted proxy appends the address it received the request from,
+        # so the hops-th entry from the right is the first one a client cannot forge.
+        forwarded_for = [address.strip() for address in request.headers.get("x-forwarded-for", "").split(",")]
+        if len(forwarded_for) >= hops and forwarded_for[-hops]:
+            return f"ip:{forwarded_for[-hops]}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def rate_limit(name: str):
+    """Dependency enforcing the named limit from RATE_LIMITS, answering 429 with Retry-After."""
+    capacity, rate = parse_limit(RATE_LIMITS[name])
+
+    async def check_rate_limit(request: Request):
+        if not settings.rate_limit_enabled:
+            return
+        retry_after = await bucket_store.take(f"{name}:{client_identity(request)}", capacity, rate)
+        if retry_after > 0:
+            rate_limit_rejections.inc(name, "rate")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit of {RATE_LIMITS[name]} exceeded, please retry later.",
+                headers={"Retry-After": str(max(1, round(retry_after)))},
+            )
+
+    return check_rate_limit
+
+
+class ConcurrencyLimiter:
+    """
+    Dependency capping how many requests run a route at once. Up to
+    `queue_size` more wait at most `queue_timeout` seconds for a slot;
+    anything beyond that is shed immediately with 503 and Retry-After.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int = settings.admission_queue_size,
+                 queue_timeout: float = settings.admission_queue_timeout):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    def _reject(self, reason: str):
+        rate_limit_rejections.inc(self.name, reason)
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The server is busy with similar requests, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    async def __call__(self):
+        if self._slots.locked() and self.waiting >= self.queue_size:
+            raise self._reject("queue_full")
+
+        self.waiting += 1
+        admission_queue_depth.inc(self.name)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("queue_timeout")
+        finally:
+            self.waiting -= 1
+            admission_queue_depth.dec(self.name)
+
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+# Full scans and aggregations share one cap; bulk loads and exports another.
+aggregation_slots = ConcurrencyLimiter("aggregation", settings.aggregation_concurrency)
+bulk_slots = ConcurrencyLimiter("bulk", settings.bulk_concurrency)
@@ -1,32 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated
-from app.auth import create_access_token, get_password_hash, verify_password
+from app.auth import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, get_password_hash_async, verify_password_async
 from datetime import timedelta
+from app.rate_limit import rate_limit
+from app.config import settings
 
 router = APIRouter()
 
 # Dummy User Database -
+# The seed hash can be supplied through TEST_USER_PASSWORD_HASH; otherwise it is
+# computed on the first login instead of costing a bcrypt round at import time.
+TEST_USER_PASSWORD = "testpassword"
 FAKE_USERS_DB = {
     "testuser": {
         "username": "testuser",
         "full_name": "Test User",
         "email": "test@example.com",
-        "hashed_password": get_password_hash("testpassword"),
+        "hashed_password": settings.test_user_password_hash or None,
         "disabled": False,
     }
 }
 
-@router.post("/token")
+async def get_user(username: str):
+    user = FAKE_USERS_DB.get(username)
+    if user and user["hashed_password"] is None:
+        user["hashed_password"] = await get_password_hash_async(TEST_USER_PASSWORD)
+    return user
+
+@router.post("/token", dependencies=[Depends(rate_limit("login"))])
 async def login_for_access_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
-    user = FAKE_USERS_DB.get(form_data.username)
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    user = await get_user(form_data.username)
+    if not user or not await verify_password_async(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=30)
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user["username"]}, expires_delta=access_token_expires
     )
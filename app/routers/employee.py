@@ -1,19 +1,111 @@
-from fastapi import Depends
+from fastapi import Depends, Header, Request
+from fastapi.responses import StreamingResponse
 from app.auth import get_current_user
 from fastapi import APIRouter, HTTPException, status
-from datetime import datetime 
-from app.database import employee_collection
+from datetime import date, datetime, timezone
+from app.database import employee_collection, employee_read_collection
+from app.database import QUERY_MAX_TIME_MS, EXPORT_MAX_TIME_MS
+from app.cache import cache, employee_key, AVG_SALARY_KEY
+from app import department_stats
+from app.events import hub, change_event
+from app.analytics import (
+    analytics_match, analytics_pipeline, analytics_helper, DEFAULT_SALARY_BAND, MAX_SALARY_BANDS, MIN_SALARY_BAND
+)
+from app.analytics_snapshot import snapshot
 from app.models import EmployeeSchema, employee_helper
-from app.models import UpdateEmployeeSchema 
-from typing import Optional, List
+from app.models import UpdateEmployeeSchema, BatchGetSchema
+from app.models import EmployeeFilterSchema, BulkUpdateSchema, BulkDeleteSchema
+from app.models import EmployeeOut, EmployeeSearchResult, EmployeePage, BatchGetResult
+from app.models import EmployeeSummary, EmployeeSummaryPage, summary_helper
+from app.responses import FastJSONResponse
+from app.export import EXPORT_BATCH_SIZE, EXPORT_MEDIA_TYPES, EXPORT_PROJECTION, export_header, render_export_rows
+from app.http_cache import conditional_response, employee_etag, page_etag, make_etag, latest
+from app.rate_limit import rate_limit, aggregation_slots, bulk_slots
+from app.pagination import KEYSET_SORT, encode_cursor, keyset_filter
+from app.search import SEARCHABLE_FIELDS, SEARCH_MAX_RESULTS, search_terms, tokenize
+from app.search import prefix_search_pipeline, text_search_pipeline
+from typing import Optional, List, Union
 from fastapi import APIRouter, HTTPException, status, Query
+from pydantic import ValidationError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+from bson import json_util
+import asyncio
+import json
 
 router = APIRouter()
 
+BULK_BATCH_SIZE = 1000
+DUPLICATE_KEY_ERROR = 11000
+
+BATCH_GET_MAX_IDS = 1000
+
+# Fields never sent to clients; excluding them keeps them off the wire from Mongo.
+EMPLOYEE_PROJECTION = {"search_terms": 0}
+# Listing with fields=summary: every field is in the listing indexes, so the query is covered.
+LIST_SUMMARY_FIELDS = ["employee_id", "department", "salary", "joining_date"]
+LIST_SUMMARY_PROJECTION = {field: 1 for field in LIST_SUMMARY_FIELDS}
+
+EVENTS_KEEPALIVE_SECONDS = 15
+# Attempts at a partial update that rebuilds search_terms from the stored
+# employee before giving up on concurrent writers with 409.
+UPDATE_ATTEMPTS = 3
+
+
+def utc_now() -> datetime:
+    """The current UTC time at MongoDB's millisecond precision, so it reads back unchanged."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def employee_to_document(employee: EmployeeSchema) -> dict:
+    """Converts a validated employee into the document stored in MongoDB."""
+    employee_dict = employee.model_dump()
+    employee_dict["joining_date"] = datetime.combine(employee.joining_date, datetime.min.time())
+    employee_dict["search_terms"] = search_terms(employee_dict)
+    employee_dict["version"] = 1
+    employee_dict["updated_at"] = utc_now()
+    return employee_dict
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """
+    Reads the expected document version from an If-Match header: either the
+    bare version such as `"3"` or the ETag returned by GET, `"<id>.3"`.
+    `*` matches any version, so the write only needs the employee to exist.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"').rpartition(".")[2])
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="If-Match must contain the employee version, e.g. \"3\"."
+        )
+
+
+async def _raise_write_miss(employee_id: str, expected_version: Optional[int]):
+    """Explains why a conditional write matched nothing: a stale version or a missing employee."""
+    if expected_version is not None:
+        current = await employee_collection.find_one(
+            {"employee_id": employee_id}, {"version": 1}, max_time_ms=QUERY_MAX_TIME_MS
+        )
+        if current:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail=f"Employee with ID {employee_id} was modified (now version "
+                       f"{current.get('version', 1)}); reload it and retry."
+            )
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Employee with ID {employee_id} not found."
+    )
+
 @router.post(
     "/",
     response_description="Add a new employee",
-    response_model=dict,
+    response_model=EmployeeOut,
     status_code=status.HTTP_201_CREATED
 )
 async def create_employee(
@@ -22,64 +114,608 @@ async def create_employee(
 ):
     """
     Insert a new employee record into the database.
+    Duplicates are rejected by the unique index on employee_id.
     """
-    
-    existing_employee = await employee_collection.find_one(
-        {"employee_id": employee.employee_id}
-    )
-    if existing_employee:
+    employee_dict = employee_to_document(employee)
+
+    try:
+        # insert_one fills in employee_dict["_id"], so the response needs no read-back.
+        await employee_collection.insert_one(employee_dict)
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Employee with ID {employee.employee_id} already exists."
         )
 
-    employee_dict = employee.model_dump()
-    employee_dict["joining_date"] = datetime.combine(employee.joining_date, datetime.min.time())
+    await department_stats.record_insert(employee_dict)
+    await cache.delete(AVG_SALARY_KEY)
+    hub.publish_local(change_event("insert", employee_dict))
 
-    new_employee = await employee_collection.insert_one(employee_dict)
+    return FastJSONResponse(employee_helper(employee_dict), status_code=status.HTTP_201_CREATED)
+
+async def _iter_bulk_rows(request: Request):
+    """
+    Yields raw rows from either a JSON array body or an NDJSON stream.
+    NDJSON is parsed line by line so large uploads are never fully buffered.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array or an NDJSON stream."
+        )
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Request body must be a JSON array of employees."
+        )
+    for row in rows:
+        yield row
+
+
+async def _insert_batch(batch: List[tuple], report: dict):
+    """Writes one batch with an unordered insert_many and records the outcome of every row."""
+    documents = [document for _, document in batch]
+    failed = {}
+    try:
+        await employee_collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed[error["index"]] = error
+
+    inserted_documents = []
+    for position, (row, document) in enumerate(batch):
+        error = failed.get(position)
+        if error is None:
+            report["inserted"].append(row)
+            inserted_documents.append(document)
+        elif error.get("code") == DUPLICATE_KEY_ERROR:
+            report["duplicates"].append({"row": row, "employee_id": document["employee_id"]})
+        else:
+            report["invalid"].append({
+                "row": row,
+                "employee_id": document["employee_id"],
+                "errors": [error.get("errmsg", "Write rejected by the database.")]
+            })
+
+    await department_stats.record_inserts(inserted_documents)
+    for document in inserted_documents:
+        hub.publish_local(change_event("insert", document))
+
+
+@router.post(
+    "/bulk",
+    response_description="Add many employees from a JSON array or NDJSON stream",
+    response_model=dict,
+    dependencies=[Depends(rate_limit("bulk")), Depends(bulk_slots)]
+)
+async def create_employees_bulk(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Insert many employee records at once.
+
+    Rows are validated and written in unordered insert_many batches. Duplicate
+    employee IDs are detected by the unique index instead of a pre-check, and
+    the response reports which rows were inserted, duplicated or invalid.
+    """
+    report = {"inserted": [], "duplicates": [], "invalid": []}
+    batch = []
+    row = -1
+
+    async for raw in _iter_bulk_rows(request):
+        row += 1
+        try:
+            if isinstance(raw, (bytes, str)):
+                employee = EmployeeSchema.model_validate_json(raw)
+            else:
+                employee = EmployeeSchema.model_validate(raw)
+        except ValidationError as e:
+            report["invalid"].append({
+                "row": row,
+                "errors": [
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                    for error in e.errors()
+                ]
+            })
+            continue
+
+        batch.append((row, employee_to_document(employee)))
+        if len(batch) >= BULK_BATCH_SIZE:
+            await _insert_batch(batch, report)
+            batch = []
+
+    if batch:
+        await _insert_batch(batch, report)
+
+    if report["inserted"]:
+        await cache.delete(AVG_SALARY_KEY)
+
+    return {
+        "total": row + 1,
+        "inserted_count": len(report["inserted"]),
+        "duplicate_count": len(report["duplicates"]),
+        "invalid_count": len(report["invalid"]),
+        **report,
+    }
+
+
+async def _batch_get(ids: List[str]) -> dict:
+    """
+    Fetches many employees, serving what it can from the cache and the rest
+    with one indexed $in query. Keeps request order and drops repeated IDs.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BATCH_GET_MAX_IDS} employee IDs can be fetched at once."
+        )
+
+    cached = await cache.get_many([employee_key(employee_id) for employee_id in ids])
+    found = {
+        employee_id: cached[employee_key(employee_id)]
+        for employee_id in ids
+        if employee_key(employee_id) in cached
+    }
+
+    misses = [employee_id for employee_id in ids if employee_id not in found]
+    if misses:
+        token = await cache.invalidation_token()
+        employees_cursor = employee_collection.find(
+            {"employee_id": {"$in": misses}}, EMPLOYEE_PROJECTION, max_time_ms=QUERY_MAX_TIME_MS
+        )
+        fetched = {employee["employee_id"]: employee_helper(employee) async for employee in employees_cursor}
+        await cache.set_many(
+            {employee_key(employee_id): employee for employee_id, employee in fetched.items()}, token=token
+        )
+        found.update(fetched)
+
+    return {
+        "items": [found[employee_id] for employee_id in ids if employee_id in found],
+        "missing": [employee_id for employee_id in ids if employee_id not in found],
+    }
+
+
+@router.post(
+    "/batch-get",
+    response_description="Get many employees by their IDs in one request",
+    response_model=BatchGetResult
+)
+async def batch_get_employees(batch: BatchGetSchema):
+    """
+    Return the requested employees in request order, plus the IDs that were not found.
+    """
+    return FastJSONResponse(await _batch_get(batch.ids))
+
+
+def employee_query(
+    department: Optional[str] = None,
+    joined_after: Optional[date] = None,
+    joined_before: Optional[date] = None,
+    min_salary: Optional[float] = None,
+    max_salary: Optional[float] = None,
+    skills: Optional[List[str]] = None
+) -> dict:
+    """Builds the employee filter shared by listings and filtered writes."""
+    query = analytics_match(department, joined_after, joined_before)
+    if min_salary is not None or max_salary is not None:
+        query["salary"] = {}
+        if min_salary is not None:
+            query["salary"]["$gte"] = min_salary
+        if max_salary is not None:
+            query["salary"]["$lte"] = max_salary
+    if skills:
+        query["skills"] = {"$all": skills}
+    return query
+
+
+async def _total_count(query: dict) -> int:
+    """Counts the matches on the index, or reads the collection's metadata count when unfiltered."""
+    if not query:
+        return await employee_read_collection.estimated_document_count()
+    return await employee_read_collection.count_documents(query, maxTimeMS=QUERY_MAX_TIME_MS)
+
+
+async def _explain(employees_cursor, query: dict) -> dict:
+    """The winning plan of a listing query and how many keys and documents it examined."""
+    explain = json.loads(json_util.dumps(await employees_cursor.explain()))
+    stats = explain.get("executionStats", {})
+    return {
+        "query": json.loads(json_util.dumps(query)),
+        "winning_plan": explain["queryPlanner"]["winningPlan"],
+        "rejected_plans": len(explain["queryPlanner"].get("rejectedPlans", [])),
+        "n_returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_time_ms": stats.get("executionTimeMillis"),
+        "index_only": stats.get("totalDocsExamined") == 0,
+    }
 
-    created_employee = await employee_collection.find_one(
-        {"_id": new_employee.inserted_id}
-    )
-    return employee_helper(created_employee)
 
 @router.get(
     "/",
     response_description="List employees with optional filtering, sorting, and pagination",
-    response_model=List[dict]
+    response_model=Union[List[EmployeeOut], EmployeePage, BatchGetResult, List[EmployeeSummary], EmployeeSummaryPage]
 )
 async def list_employees(
+    request: Request,
     department: Optional[str] = None,
+    min_salary: Optional[float] = Query(None, ge=0, description="Only employees earning at least this much"),
+    max_salary: Optional[float] = Query(None, ge=0, description="Only employees earning at most this much"),
+    joined_after: Optional[date] = Query(None, description="Only employees who joined on or after this date"),
+    joined_before: Optional[date] = Query(None, description="Only employees who joined on or before this date"),
+    skills: Optional[str] = Query(None, description="Comma-separated skills; employees must have all of them"),
+    fields: str = Query(
+        "all", pattern="^(all|summary)$",
+        description="summary: only id, employee_id, department, salary and joining_date, read from the index alone"
+    ),
     skip: int = Query(0, ge=0, description="Number of records to skip for pagination"),
-    limit: int = Query(10, gt=0, le=100, description="Maximum number of records to return")
+    limit: int = Query(10, gt=0, le=100, description="Maximum number of records to return"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Opaque cursor for keyset pagination. Pass an empty value for the first page, "
+                    "then the returned next_cursor. Ignores skip when set."
+    ),
+    ids: Optional[str] = Query(
+        None,
+        description="Comma-separated employee IDs to fetch in one request; returns items and missing IDs"
+    ),
+    total: bool = Query(True, description="Send the number of matching employees in X-Total-Count"),
+    explain: bool = Query(False, description="Return the winning query plan instead of the employees")
 ):
     """
-    List employees with pagination, optional filtering by department,
-    and sorted by joining_date (newest first).
+    List employees with pagination, optional filtering by department, salary
+    range, joining-date range and skills, sorted by joining_date (newest first).
+
+    With `cursor` set, pages are fetched by keyset on (joining_date, _id) and
+    the response is `{"items": [...], "next_cursor": ...}`, so deep pages cost
+    the same as the first one.
+
+    With `ids` set, the listing is replaced by a batch lookup of those employees.
+
+    Every filter except skills is answered from the listing indexes, and with
+    `fields=summary` the whole query is covered by them. X-Total-Count is an
+    index count, or the collection's estimated count when nothing is filtered.
+
+    Every response carries an ETag built from the returned employees' ids and
+    versions (or summary values) and the total; a matching If-None-Match is
+    answered with 304 and no body.
     """
-    query = {}
-    if department:
-        query["department"] = department
+    if ids is not None:
+        result = await _batch_get([employee_id.strip() for employee_id in ids.split(",") if employee_id.strip()])
+        return _conditional_page(request, result, result["items"], *result["missing"])
+
+    skill_list = [skill.strip() for skill in skills.split(",") if skill.strip()] if skills else None
+    query = employee_query(department, joined_after, joined_before, min_salary, max_salary, skill_list)
+    count_query = dict(query)
+    summary = fields == "summary"
+    projection = LIST_SUMMARY_PROJECTION if summary else EMPLOYEE_PROJECTION
+    helper = summary_helper if summary else employee_helper
+
+    if cursor:
+        try:
+            query.update(keyset_filter(cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    employees_cursor = (
+        employee_read_collection.find(query, projection, max_time_ms=QUERY_MAX_TIME_MS).sort(KEYSET_SORT)
+    )
+    if cursor is None:
+        employees_cursor = employees_cursor.skip(skip).limit(limit)
+    else:
+        # Fetch one extra row to learn whether another page exists.
+        employees_cursor = employees_cursor.limit(limit + 1)
 
-    employees_cursor = employee_collection.find(query).sort("joining_date", -1).skip(skip).limit(limit)
-    
-    employees = [employee_helper(employee) async for employee in employees_cursor]
-    return employees
+    if explain:
+        return FastJSONResponse(await _explain(employees_cursor, query))
+
+    async def read_page():
+        return [employee async for employee in employees_cursor]
+
+    if total:
+        documents, matches = await asyncio.gather(read_page(), _total_count(count_query))
+        headers = {"X-Total-Count": str(matches)}
+    else:
+        documents, matches, headers = await read_page(), None, None
+
+    if cursor is None:
+        employees = [helper(employee) for employee in documents]
+        return _conditional_page(request, employees, employees, matches, summary=summary, headers=headers)
+
+    next_cursor = encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+    employees = [helper(employee) for employee in documents[:limit]]
+    return _conditional_page(
+        request, {"items": employees, "next_cursor": next_cursor}, employees, next_cursor, matches,
+        summary=summary, headers=headers
+    )
+
+
+def _conditional_page(request: Request, content, employees: List[dict], *extra,
+                      summary: bool = False, headers: Optional[dict] = None):
+    """Answers a listing with validators derived from the employees it contains."""
+    if summary:
+        # Summary rows carry no version; their values are the validator.
+        return conditional_response(
+            request, content, make_etag(*(tuple(employee.values()) for employee in employees), *extra),
+            headers=headers
+        )
+    last_modified = latest(
+        datetime.fromisoformat(employee["updated_at"]) for employee in employees if employee.get("updated_at")
+    )
+    return conditional_response(request, content, page_etag(employees, *extra), last_modified, headers=headers)
+
+
+def export_query(department: Optional[str] = None) -> dict:
+    return {"department": department} if department else {}
+
+
+async def _export_rows(query: dict, export_format: str):
+    """
+    Streams the matching employees as NDJSON lines or CSV rows.
+    Rows are serialized while the cursor is read, one batch at a time, so
+    memory use does not grow with the size of the collection.
+    """
+    employees_cursor = employee_read_collection.find(
+        query, EXPORT_PROJECTION, batch_size=EXPORT_BATCH_SIZE, max_time_ms=EXPORT_MAX_TIME_MS
+    )
+    if export_format == "csv":
+        yield export_header(export_format)
+
+    records = []
+    async for employee in employees_cursor:
+        records.append(employee_helper(employee))
+        if len(records) >= EXPORT_BATCH_SIZE:
+            yield render_export_rows(records, export_format)
+            records = []
+
+    if records:
+        yield render_export_rows(records, export_format)
+
+
+@router.get(
+    "/export",
+    response_description="Stream every employee as NDJSON or CSV",
+    dependencies=[Depends(rate_limit("export")), Depends(bulk_slots)]
+)
+async def export_employees(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv"),
+    department: Optional[str] = None
+):
+    """
+    Export the employee collection, optionally filtered by department,
+    as a streamed download.
+    """
+    return StreamingResponse(
+        _export_rows(export_query(department), format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=employees.{format}"}
+    )
+
+
+@router.get(
+    "/search",
+    response_description="Search employees by name, skills or department",
+    response_model=List[EmployeeSearchResult],
+    dependencies=[Depends(rate_limit("search"))]
+)
+@router.get("/search/", include_in_schema=False, dependencies=[Depends(rate_limit("search"))])
+async def search_employees(
+    q: Optional[str] = Query(None, min_length=1, description="Words to search for in name, skills and department"),
+    mode: str = Query("prefix", pattern="^(prefix|text)$", description="prefix: case-insensitive word prefixes; text: full-text"),
+    skill: Optional[str] = Query(None, description="Exact skill to match (legacy)"),
+    skip: int = Query(0, ge=0, description="Number of results to skip"),
+    limit: int = Query(20, gt=0, le=100, description="Maximum number of results to return")
+):
+    """
+    Find employees whose name, skills or department match the query, ranked by
+    relevance. Results are index-backed and never exceed SEARCH_MAX_RESULTS.
+    """
+    if skip + limit > SEARCH_MAX_RESULTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Search results are capped at {SEARCH_MAX_RESULTS}; narrow the query instead of paging further."
+        )
+
+    if q and not tokenize(q):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The search query must contain at least one letter or digit."
+        )
+
+    if q:
+        if mode == "text":
+            pipeline = text_search_pipeline(q, skip, limit)
+        else:
+            pipeline = prefix_search_pipeline(q, skip, limit)
+        employees_cursor = employee_read_collection.aggregate(pipeline, maxTimeMS=QUERY_MAX_TIME_MS)
+        return FastJSONResponse(
+            [{**employee_helper(employee), "score": employee["score"]} async for employee in employees_cursor]
+        )
+
+    if skill:
+        employees_cursor = (
+            employee_read_collection.find({"skills": skill}, EMPLOYEE_PROJECTION, max_time_ms=QUERY_MAX_TIME_MS)
+            .sort("_id", 1).skip(skip).limit(limit)
+        )
+        return FastJSONResponse([employee_helper(employee) async for employee in employees_cursor])
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Provide a search query (q) or a skill."
+    )
+
+
+async def analytics_report(
+    department: Optional[str] = None,
+    joined_after: Optional[date] = None,
+    joined_before: Optional[date] = None,
+    interval: str = "month",
+    top_skills: int = 10,
+    salary_band: float = DEFAULT_SALARY_BAND,
+    max_time_ms: int = QUERY_MAX_TIME_MS
+) -> dict:
+    """Builds the analytics report from the snapshot when it is loaded, otherwise with one $facet aggregation."""
+    if snapshot is not None and snapshot.ready:
+        return await snapshot.run_analytics(department, joined_after, joined_before, interval, top_skills, salary_band)
+
+    pipeline = analytics_pipeline(
+        analytics_match(department, joined_after, joined_before), interval, top_skills, salary_band
+    )
+    result_cursor = employee_read_collection.aggregate(pipeline, allowDiskUse=True, maxTimeMS=max_time_ms)
+    result = [doc async for doc in result_cursor]
+    return analytics_helper(result[0], salary_band)
+
+
+@router.get(
+    "/analytics",
+    response_description="Department, salary, joining-date and skill analytics in one pass",
+    response_model=dict,
+    dependencies=[Depends(rate_limit("analytics")), Depends(aggregation_slots)]
+)
+async def get_employee_analytics(
+    department: Optional[str] = None,
+    joined_after: Optional[date] = Query(None, description="Only employees who joined on or after this date"),
+    joined_before: Optional[date] = Query(None, description="Only employees who joined on or before this date"),
+    interval: str = Query("month", pattern="^(month|year)$", description="Joining-date histogram bucket size"),
+    top_skills: int = Query(10, gt=0, le=100, description="Number of most common skills to return"),
+    salary_band: float = Query(
+        DEFAULT_SALARY_BAND, ge=MIN_SALARY_BAND,
+        description=f"Width of the salary histogram bands; at most {MAX_SALARY_BANDS} bands are returned"
+    )
+):
+    """
+    Returns headcount and salary percentiles per department, joining-date and
+    salary-band histograms and the top skills. Served from the in-process
+    analytics snapshot when it is enabled and loaded, otherwise by a single
+    $facet aggregation; `source` tells which.
+    For large collections submit the report as a background job instead
+    (POST /jobs with kind "analytics").
+    """
+    return FastJSONResponse(
+        await analytics_report(department, joined_after, joined_before, interval, top_skills, salary_band)
+    )
+
+
+@router.get(
+    "/analytics/snapshot",
+    response_description="State and memory footprint of the in-process analytics snapshot",
+    response_model=dict
+)
+async def get_analytics_snapshot_stats():
+    """
+    Reports whether analytics are served from the snapshot, how many employees
+    it holds and how much memory it uses.
+    """
+    if snapshot is None:
+        return {"enabled": False}
+    return snapshot.stats()
+
+
+def _sse(event_id: Optional[str], event: dict) -> str:
+    lines = f"id: {event_id}\n" if event_id else ""
+    return f"{lines}event: {event['op']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _event_stream(request: Request, last_event_id: Optional[str]):
+    """Replays missed events after last_event_id, then forwards live ones until the client leaves."""
+    queue = hub.subscribe()
+    try:
+        missed = hub.events_after(last_event_id)
+        if missed is None:
+            yield _sse(hub.last_event_id, {"op": "reset", "id": None, "employee": None})
+        else:
+            for event_id, event in missed:
+                yield _sse(event_id, event)
+
+        while not await request.is_disconnected():
+            try:
+                entry = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if entry is None:
+                yield _sse(hub.last_event_id, {"op": "reset", "id": None, "employee": None})
+                return
+            yield _sse(*entry)
+    finally:
+        hub.unsubscribe(queue)
+
+
+@router.get(
+    "/events",
+    response_description="Live employee inserts, updates and deletes"
+)
+async def employee_events(
+    request: Request,
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id"),
+    once: bool = Query(False, description="Return the events after last_event_id as JSON instead of streaming"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-Sent Events feed of employee changes, backed by a MongoDB change
+    stream when available. Reconnect with Last-Event-ID (or last_event_id) to
+    receive what was missed; a "reset" event means the client should reload.
+
+    With `once=true` the missed events are returned as a JSON document, which
+    suits clients that poll for deltas instead of holding a connection open.
+    """
+    last_event_id = last_event_id or last_event_id_header
+    if once:
+        missed = hub.events_after(last_event_id)
+        return {
+            "mode": hub.mode,
+            "reset": missed is None,
+            "events": [event for _, event in missed or []],
+            "last_event_id": hub.last_event_id,
+        }
+
+    return StreamingResponse(
+        _event_stream(request, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get(
     "/{employee_id}",
     response_description="Get a single employee by their ID",
-    response_model=dict
+    response_model=EmployeeOut
 )
-async def get_employee(employee_id: str):
+async def get_employee(employee_id: str, request: Request):
     """
     Find and return an employee record by their unique employee_id.
+    Supports conditional requests through ETag/If-None-Match and Last-Modified.
     """
-    employee = await employee_collection.find_one({"employee_id": employee_id})
+    employee = await cache.get(employee_key(employee_id))
+    if employee is None:
+        token = await cache.invalidation_token()
+        document = await employee_collection.find_one(
+            {"employee_id": employee_id}, EMPLOYEE_PROJECTION, max_time_ms=QUERY_MAX_TIME_MS
+        )
+        if document:
+            employee = employee_helper(document)
+            await cache.set(employee_key(employee_id), employee, token=token)
 
     if employee:
-        return employee_helper(employee)
+        last_modified = datetime.fromisoformat(employee["updated_at"]) if employee.get("updated_at") else None
+        return conditional_response(request, employee, employee_etag(employee), last_modified)
 
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -90,16 +726,20 @@ async def get_employee(employee_id: str):
 @router.put(
     "/{employee_id}",
     response_description="Update an employee's details",
-    response_model=dict
+    response_model=EmployeeOut
 )
 async def update_employee(
     employee_id: str,
     update_data: UpdateEmployeeSchema,
+    if_match: Optional[str] = Header(None, description="Expected employee version for optimistic concurrency"),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Update an existing employee's record.
+    Update an existing employee's record in a single atomic call.
+    With If-Match, the update only applies if the stored version still matches,
+    otherwise 412 is returned so concurrent edits cannot overwrite each other.
     """
+    expected_version = parse_if_match(if_match)
     update_fields = update_data.model_dump(exclude_unset=True)
 
     # 1. FIX: Check if joining_date is being updated
@@ -109,25 +749,67 @@ async def update_employee(
             update_fields["joining_date"], datetime.min.time()
         )
 
+    query = {"employee_id": employee_id}
+    if expected_version is not None:
+        query["version"] = expected_version
+
     if len(update_fields) >= 1:
-        result = await employee_collection.update_one(
-            {"employee_id": employee_id}, {"$set": update_fields}
-        )
+        update_fields["updated_at"] = utc_now()
+        # When every searchable field is supplied (as the UI form does) the new
+        # search terms can be written in the same call. A partial change to a
+        # searchable field rebuilds them from the stored employee, and the write
+        # only applies if that employee has not changed since it was read.
+        rebuild_terms = any(field in update_fields for field in SEARCHABLE_FIELDS)
+        if all(field in update_fields for field in SEARCHABLE_FIELDS):
+            update_fields["search_terms"] = search_terms(update_fields)
+            rebuild_terms = False
 
-        if result.matched_count == 1:
-            updated_employee = await employee_collection.find_one(
-                {"employee_id": employee_id}
+        # The pre-image tells us which department bucket the employee leaves,
+        # and the post-image is the pre-image plus our changes.
+        previous_employee = None
+        for _ in range(UPDATE_ATTEMPTS):
+            write_query = query
+            if rebuild_terms:
+                current = await employee_collection.find_one(
+                    query, {**{field: 1 for field in SEARCHABLE_FIELDS}, "version": 1},
+                    max_time_ms=QUERY_MAX_TIME_MS
+                )
+                if current is None:
+                    break
+                update_fields["search_terms"] = search_terms({**current, **update_fields})
+                write_query = {"_id": current["_id"], "version": current.get("version")}
+            previous_employee = await employee_collection.find_one_and_update(
+                write_query,
+                {"$set": update_fields, "$inc": {"version": 1}},
+                return_document=ReturnDocument.BEFORE
+            )
+            if previous_employee is not None or not rebuild_terms:
+                break
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Employee with ID {employee_id} is being modified concurrently; retry the update."
             )
-            return employee_helper(updated_employee)
+        if previous_employee is None:
+            await _raise_write_miss(employee_id, expected_version)
 
-    existing_employee = await employee_collection.find_one({"employee_id": employee_id})
+        updated_employee = {
+            **previous_employee,
+            **update_fields,
+            "version": previous_employee.get("version", 0) + 1,
+        }
+        await cache.delete(employee_key(employee_id))
+        if "salary" in update_fields or "department" in update_fields:
+            await department_stats.record_update(previous_employee, updated_employee)
+            await cache.delete(AVG_SALARY_KEY)
+        hub.publish_local(change_event("update", updated_employee))
+        return FastJSONResponse(employee_helper(updated_employee))
+
+    existing_employee = await employee_collection.find_one(query, EMPLOYEE_PROJECTION, max_time_ms=QUERY_MAX_TIME_MS)
     if existing_employee:
-        return employee_helper(existing_employee)
+        return FastJSONResponse(employee_helper(existing_employee))
 
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail=f"Employee with ID {employee_id} not found."
-    )
+    await _raise_write_miss(employee_id, expected_version)
 
 
 
@@ -137,71 +819,222 @@ async def update_employee(
 )
 async def delete_employee(
     employee_id: str,
+    if_match: Optional[str] = Header(None, description="Expected employee version for optimistic concurrency"),
     current_user: dict = Depends(get_current_user) 
 ):
     """
     Delete an employee record by their unique employee_id.
     """
-    result = await employee_collection.delete_one({"employee_id": employee_id})
+    expected_version = parse_if_match(if_match)
+    query = {"employee_id": employee_id}
+    if expected_version is not None:
+        query["version"] = expected_version
 
-    if result.deleted_count == 1:
+    deleted_employee = await employee_collection.find_one_and_delete(query)
+
+    if deleted_employee:
+        await department_stats.record_delete(deleted_employee)
+        await cache.delete(employee_key(employee_id), AVG_SALARY_KEY)
+        hub.publish_local(change_event("delete", object_id=deleted_employee["_id"]))
         return {
             "status": "success",
             "message": f"Employee with ID {employee_id} deleted successfully."
         }
 
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail=f"Employee with ID {employee_id} not found."
+    await _raise_write_miss(employee_id, expected_version)
+
+
+def _filter_query(employee_filter: EmployeeFilterSchema) -> dict:
+    query = employee_query(
+        employee_filter.department, employee_filter.joined_after, employee_filter.joined_before,
+        employee_filter.min_salary, employee_filter.max_salary, employee_filter.skills
     )
+    if employee_filter.employee_ids:
+        query["employee_id"] = {"$in": employee_filter.employee_ids}
+    return query
+
+
+async def _departments(query: dict) -> set:
+    """The departments of the employees a filtered write will touch, grouped on the server."""
+    return set(await employee_collection.distinct("department", query, maxTimeMS=EXPORT_MAX_TIME_MS))
+
+
+async def _after_filtered_write(departments: set):
+    """Invalidates what a filtered write made stale and recomputes the departments it touched."""
+    # The written employees are never read back, so every cached read is dropped.
+    await cache.clear()
+    if departments:
+        await department_stats.refresh_departments(departments)
+    # One reset instead of an event per employee; clients reload and the
+    # analytics snapshot reconciles its rows.
+    hub.publish_local({"op": "reset", "id": None, "employee": None})
+
+
+def _bulk_write_counts(e: BulkWriteError) -> tuple:
+    return e.details.get("nMatched", 0), e.details.get("nModified", 0)
+
+
+@router.patch(
+    "/",
+    response_description="Update every employee matching a filter",
+    response_model=dict,
+    dependencies=[Depends(rate_limit("bulk")), Depends(bulk_slots)]
+)
+async def update_employees(
+    body: BulkUpdateSchema,
+    dry_run: bool = Query(False, description="Only count the employees the change would apply to"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Apply one change, such as a 5% raise, to every employee matching the filter.
+
+    Runs as a single update_many on the server. When name, skills or
+    department are set each employee needs its own search terms, so the
+    matches are streamed in _id order and written BULK_BATCH_SIZE at a time
+    with unordered bulk_writes.
+    """
+    query = _filter_query(body.filter)
+    if dry_run:
+        matched = await employee_collection.count_documents(query, maxTimeMS=QUERY_MAX_TIME_MS)
+        return {"dry_run": True, "matched_count": matched, "modified_count": 0}
+
+    changes = body.set.model_dump(exclude_none=True) if body.set else {}
+    if "joining_date" in changes:
+        changes["joining_date"] = datetime.combine(changes["joining_date"], datetime.min.time())
+
+    update = {"$set": {**changes, "updated_at": utc_now()}, "$inc": {"version": 1}}
+    if body.salary_percent is not None:
+        update["$mul"] = {"salary": 1 + body.salary_percent / 100}
+    if body.salary_increment is not None:
+        update["$inc"]["salary"] = body.salary_increment
+
+    departments = set()
+    if "department" in changes or "salary" in changes or "$mul" in update or "salary" in update["$inc"]:
+        departments = await _departments(query) | {changes.get("department")}
+
+    matched = modified = 0
+    try:
+        if any(field in changes for field in SEARCHABLE_FIELDS):
+            # The _id order means an employee whose index keys change is not met again.
+            employees_cursor = employee_collection.find(
+                query, {field: 1 for field in SEARCHABLE_FIELDS}, batch_size=BULK_BATCH_SIZE,
+                max_time_ms=EXPORT_MAX_TIME_MS
+            ).sort("_id", 1)
+            batch = []
+            async for employee in employees_cursor:
+                batch.append(UpdateOne(
+                    {**query, "_id": employee["_id"]},
+                    {**update, "$set": {**update["$set"], "search_terms": search_terms({**employee, **changes})}}
+                ))
+                if len(batch) >= BULK_BATCH_SIZE:
+                    result = await employee_collection.bulk_write(batch, ordered=False)
+                    matched += result.matched_count
+                    modified += result.modified_count
+                    batch = []
+            if batch:
+                result = await employee_collection.bulk_write(batch, ordered=False)
+                matched += result.matched_count
+                modified += result.modified_count
+        else:
+            result = await employee_collection.update_many(query, update)
+            matched, modified = result.matched_count, result.modified_count
+    except BulkWriteError as e:
+        batch_matched, batch_modified = _bulk_write_counts(e)
+        matched += batch_matched
+        modified += batch_modified
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Update rejected by the database after {modified} employees were changed: {e}"
+        )
+    except WriteError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Update rejected by the database; employees it reached before the error were changed: {e}"
+        )
+    finally:
+        await _after_filtered_write(departments)
+
+    return {"dry_run": False, "matched_count": matched, "modified_count": modified}
+
+
+@router.delete(
+    "/",
+    response_description="Delete every employee matching a filter",
+    response_model=dict,
+    dependencies=[Depends(rate_limit("bulk")), Depends(bulk_slots)]
+)
+async def delete_employees(
+    body: BulkDeleteSchema,
+    dry_run: bool = Query(False, description="Only count the employees that would be deleted"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Delete every employee matching the filter with a single delete_many.
+    """
+    query = _filter_query(body.filter)
+    if dry_run:
+        matched = await employee_collection.count_documents(query, maxTimeMS=QUERY_MAX_TIME_MS)
+        return {"dry_run": True, "matched_count": matched, "deleted_count": 0}
+
+    departments = await _departments(query)
+    deleted = 0
+    try:
+        result = await employee_collection.delete_many(query)
+        deleted = result.deleted_count
+    finally:
+        await _after_filtered_write(departments)
+
+    return {"dry_run": False, "matched_count": deleted, "deleted_count": deleted}
 
 
 @router.get(
     "/avg-salary/by-department",
-    response_description="Get the average salary grouped by department",
-    response_model=List[dict]
-)
-async def get_average_salary_by_department():
-    """
-    Calculates the average salary for each department using an aggregation pipeline.
-    """
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$department",
-                "avg_salary": {"$avg": "$salary"}
-            }
-        },
-        {
-            "$project": {
-                "department": "$_id",
-                "avg_salary": 1,
-                "_id": 0
-            }
+    response_description="Get salary statistics grouped by department",
+    response_model=List[dict],
+    dependencies=[Depends(rate_limit("avg_salary")), Depends(aggregation_slots)]
+)
+async def get_average_salary_by_department(request: Request):
+    """
+    Returns average salary, headcount, min/max and standard deviation for each
+    department from the incrementally maintained department_stats collection.
+    The report's ETag is cached with it, so revalidation costs no database call.
+    """
+    report = await cache.get(AVG_SALARY_KEY)
+    if report is None:
+        token = await cache.invalidation_token()
+        rows, last_modified = await department_stats.read_department_stats()
+        report = {
+            "items": rows,
+            "etag": make_etag(*(sorted(row.items()) for row in rows)),
+            "last_modified": last_modified.isoformat() if last_modified else None,
         }
-    ]
-    
-    result_cursor = employee_collection.aggregate(pipeline)
-    result = [doc async for doc in result_cursor]
-    
-    if result:
-        return result
-    
-    return []
+        await cache.set(AVG_SALARY_KEY, report, token=token)
+
+    last_modified = datetime.fromisoformat(report["last_modified"]) if report["last_modified"] else None
+    return conditional_response(request, report["items"], report["etag"], last_modified)
+
+
+@router.post(
+    "/department-stats/rebuild",
+    response_description="Rebuild department statistics from the employee collection",
+    dependencies=[Depends(rate_limit("stats_admin")), Depends(aggregation_slots)]
+)
+async def rebuild_department_stats(current_user: dict = Depends(get_current_user)):
+    """
+    Recompute the department_stats collection from scratch with a full aggregation.
+    """
+    departments = await department_stats.rebuild_department_stats()
+    await cache.delete(AVG_SALARY_KEY)
+    return {"status": "success", "departments": departments}
 
 
 @router.get(
-    "/search/",
-    response_description="Search for employees by skill",
-    response_model=List[dict]
+    "/department-stats/consistency",
+    response_description="Compare department statistics with a live aggregation",
+    dependencies=[Depends(rate_limit("stats_admin")), Depends(aggregation_slots)]
 )
-async def search_employees_by_skill(skill: str):
+async def check_department_stats(current_user: dict = Depends(get_current_user)):
     """
-    Find all employees who possess a given skill.
+    Report any department whose materialized statistics differ from the live data.
     """
-    query = {"skills": skill}
-    employees_cursor = employee_collection.find(query)
-    
-    employees = [employee_helper(employee) async for employee in employees_cursor]
-    
-    return employees
+    return await department_stats.check_department_stats()
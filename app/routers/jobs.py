@@ -0,0 +1,142 @@
+import asyncio
+import tempfile
+from pathlib import Path
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
+from app.auth import get_current_user
+from app.database import employee_read_collection, EXPORT_MAX_TIME_MS
+from app.export import EXPORT_BATCH_SIZE, EXPORT_MEDIA_TYPES, EXPORT_PROJECTION, export_header, render_export_rows
+from app.jobs import jobs, Job, SUCCEEDED, FAILED
+from app.models import JobSchema, AnalyticsJobParams, ExportJobParams, employee_helper
+from app.rate_limit import rate_limit
+from app.responses import FastJSONResponse
+from app.routers.employee import analytics_report, export_query
+
+router = APIRouter()
+
+JOB_PARAMS = {"analytics": AnalyticsJobParams, "export": ExportJobParams}
+
+
+async def run_analytics_job(job: Job, params: dict):
+    report = await analytics_report(**AnalyticsJobParams(**params).model_dump(), max_time_ms=EXPORT_MAX_TIME_MS)
+    return report, "application/json"
+
+
+async def run_export_job(job: Job, params: dict):
+    """
+    Writes the export to a temporary file, which the runner deletes when the
+    job expires; batches are formatted through the job runner's CPU executor.
+    """
+    params = ExportJobParams(**params)
+    query = export_query(params.department)
+    total = await employee_read_collection.count_documents(query, maxTimeMS=EXPORT_MAX_TIME_MS)
+    employees_cursor = employee_read_collection.find(
+        query, EXPORT_PROJECTION, batch_size=EXPORT_BATCH_SIZE, max_time_ms=EXPORT_MAX_TIME_MS
+    )
+
+    spool = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", newline="", prefix=f"export-{job.id}-", suffix=f".{params.format}", delete=False
+    )
+    try:
+        with spool:
+            spool.write(export_header(params.format))
+            records = []
+            done = 0
+            async for employee in employees_cursor:
+                records.append(employee_helper(employee))
+                if len(records) >= EXPORT_BATCH_SIZE:
+                    rows = await jobs.run_cpu(render_export_rows, records, params.format)
+                    await asyncio.to_thread(spool.write, rows)
+                    done += len(records)
+                    job.progress = min(done / total, 0.99) if total else 0.0
+                    records = []
+            if records:
+                rows = await jobs.run_cpu(render_export_rows, records, params.format)
+                await asyncio.to_thread(spool.write, rows)
+    except BaseException:
+        Path(spool.name).unlink(missing_ok=True)
+        raise
+    return Path(spool.name), EXPORT_MEDIA_TYPES[params.format]
+
+
+jobs.register("analytics", run_analytics_job)
+jobs.register("export", run_export_job)
+
+
+def _get_job(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found; it may have expired."
+        )
+    return job
+
+
+@router.post(
+    "/",
+    response_description="Submit a report or export to run in the background",
+    response_model=dict,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("jobs"))]
+)
+async def submit_job(body: JobSchema, current_user: dict = Depends(get_current_user)):
+    """
+    Queue an analytics report or an employee export and return the job right
+    away. Poll GET /jobs/{id} until it has succeeded, then download
+    /jobs/{id}/result. Submitting the same job again while it is queued,
+    running or recently finished returns the existing one.
+    """
+    try:
+        params = JOB_PARAMS[body.kind](**body.params).model_dump(mode="json")
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.errors(include_url=False, include_context=False)
+        )
+    job = jobs.submit(body.kind, params)
+    return FastJSONResponse(
+        job.view(), status_code=status.HTTP_202_ACCEPTED, headers={"Location": f"/jobs/{job.id}"}
+    )
+
+
+@router.get(
+    "/{job_id}",
+    response_description="Status and progress of a background job",
+    response_model=dict
+)
+async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Returns the job's status (queued, running, succeeded or failed), its
+    progress between 0 and 1 and, once it has succeeded, where to download it.
+    """
+    return _get_job(job_id).view()
+
+
+@router.get(
+    "/{job_id}/result",
+    response_description="Download the result of a finished job"
+)
+async def get_job_result(job_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Returns the report as JSON or the export as a file. Results are kept for
+    JOB_RESULT_TTL_SECONDS after the job finishes.
+    """
+    job = _get_job(job_id)
+    if job.status == FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job failed: {job.error}; submit it again to retry."
+        )
+    if job.status != SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is still {job.status}; poll /jobs/{job_id} until it has succeeded.",
+            headers={"Retry-After": "1"}
+        )
+
+    if job.media_type == "application/json":
+        return FastJSONResponse(job.result)
+    extension = "csv" if job.media_type == "text/csv" else "ndjson"
+    return FileResponse(job.result, media_type=job.media_type, filename=f"employees.{extension}")
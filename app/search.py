@@ -0,0 +1,58 @@
+import re
+from typing import List
+
+# Employees carry a `search_terms` array: the lowercased words of name, skills
+# and department plus each full skill/department phrase. A multikey index on it
+# serves case-insensitive prefix search through anchored regexes, and a text
+# index on the raw fields serves full-text search.
+SEARCHABLE_FIELDS = ("name", "skills", "department")
+SEARCH_MAX_RESULTS = 1000
+
+_WORD = re.compile(r"\w[\w+#.\-]*")
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def search_terms(employee: dict) -> List[str]:
+    """Builds the normalized search_terms array for an employee document."""
+    terms = set(tokenize(employee.get("name", "")))
+    for phrase in [*employee.get("skills", []), employee.get("department", "")]:
+        terms.update(tokenize(phrase))
+        terms.add(phrase.strip().lower())
+    terms.discard("")
+    return sorted(terms)
+
+
+def prefix_search_pipeline(q: str, skip: int, limit: int) -> List[dict]:
+    """
+    Every query word must prefix-match a search term. All matches are ranked
+    by how many query words match a term exactly, and only the best
+    SEARCH_MAX_RESULTS are kept; the $sort/$limit pair runs as a top-k sort,
+    so memory stays bounded however many employees match.
+    """
+    words = tokenize(q)
+    return [
+        {"$match": {"$and": [{"search_terms": {"$regex": f"^{re.escape(word)}"}} for word in words]}},
+        {"$addFields": {"score": {"$size": {
+            "$filter": {"input": "$search_terms", "cond": {"$in": ["$$this", words]}}
+        }}}},
+        {"$sort": {"score": -1, "name": 1, "_id": 1}},
+        {"$limit": SEARCH_MAX_RESULTS},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": {"search_terms": 0}},
+    ]
+
+
+def text_search_pipeline(q: str, skip: int, limit: int) -> List[dict]:
+    """Full-text search over the text index, ranked by MongoDB's textScore."""
+    return [
+        {"$match": {"$text": {"$search": q}}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+        {"$sort": {"score": {"$meta": "textScore"}, "_id": 1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": {"search_terms": 0}},
+    ]
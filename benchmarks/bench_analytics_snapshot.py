@@ -0,0 +1,77 @@
+"""
+Builds the columnar analytics snapshot from synthetic employees in memory
+(no database) and reports its load time, memory footprint, the cost of an
+incremental refresh and the latency of analytics queries served from it:
+
+    python -m benchmarks.bench_analytics_snapshot --rows 1000000
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime
+
+from bson import ObjectId
+
+from app.analytics_snapshot import LOAD_BATCH_SIZE, EmployeeSnapshot
+from benchmarks.data import make_employee
+
+
+def timed(label: str, func, repeat: int):
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{label:>28}: {elapsed * 1000:9.3f} ms")
+
+
+def run(rows: int, repeat: int, updates: int):
+    rng = random.Random(7)
+    now = datetime(2026, 1, 1)
+    snapshot = EmployeeSnapshot(max_rows=rows * 2)
+
+    started = time.perf_counter()
+    documents = []
+    for start in range(0, rows, LOAD_BATCH_SIZE):
+        batch = []
+        for i in range(start, min(rows, start + LOAD_BATCH_SIZE)):
+            employee = make_employee(i, rng=rng)
+            employee.update(_id=ObjectId(), version=1, updated_at=now)
+            batch.append(employee)
+        snapshot.apply(batch)
+        documents.extend(rng.sample(batch, min(len(batch), max(1, updates * LOAD_BATCH_SIZE // rows))))
+    snapshot.compact()
+    print(f"Loaded {snapshot.rows} employees in {time.perf_counter() - started:.1f}s (including generation)")
+    print(f"Memory: {snapshot.memory_bytes() / 2**20:.1f} MiB "
+          f"({snapshot.memory_bytes() / snapshot.rows:.1f} bytes per employee)")
+
+    for employee in documents:
+        employee["salary"] = float(rng.randint(30000, 200000))
+        employee["version"] += 1
+    started = time.perf_counter()
+    snapshot.apply(documents)
+    print(f"Incremental refresh of {len(documents)} changed employees: "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    queries = {
+        "all employees": {},
+        "one department": {"department": "Engineering"},
+        "date range": {"joined_after": date(2018, 1, 1), "joined_before": date(2020, 12, 31), "interval": "year"},
+    }
+    for label, params in queries.items():
+        def uncached():
+            snapshot._derived()["results"].clear()
+            snapshot.analytics(**params)
+
+        timed(f"{label} (computed)", uncached, repeat)
+        timed(f"{label} (repeat)", lambda: snapshot.analytics(**params), repeat)
+    print(f"Memory with query helpers: {snapshot.memory_bytes() / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=5000, help="Employees changed before the refresh")
+    args = parser.parse_args()
+    run(args.rows, args.repeat, args.updates)
@@ -0,0 +1,32 @@
+"""
+Micro-benchmark of the per-request token verification done by
+get_current_user, with and without the verification cache:
+
+    python -m benchmarks.bench_auth --iterations 50000
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from app import auth
+
+
+def bench(label: str, iterations: int, token: str, use_cache: bool):
+    auth.clear_token_cache()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if not use_cache:
+            auth.clear_token_cache()
+        auth.decode_token(token)
+    elapsed = time.perf_counter() - started
+    print(f"{label:>10}: {elapsed / iterations * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = auth.create_access_token({"sub": "testuser"}, expires_delta=timedelta(minutes=30))
+    bench("uncached", args.iterations, token, use_cache=False)
+    bench("cached", args.iterations, token, use_cache=True)
@@ -0,0 +1,59 @@
+"""
+Compares rows/sec of the single-record create path (find -> insert -> find)
+with the unordered insert_many batches used by POST /employees/bulk.
+
+Runs against MONGO_DETAILS and writes to a throwaway collection:
+
+    python -m benchmarks.bench_bulk_insert --rows 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import motor.motor_asyncio
+from dotenv import load_dotenv
+
+from benchmarks.data import make_employee
+
+load_dotenv()
+
+
+async def single_record(collection, rows):
+    for row in rows:
+        if await collection.find_one({"employee_id": row["employee_id"]}):
+            continue
+        result = await collection.insert_one(row)
+        await collection.find_one({"_id": result.inserted_id})
+
+
+async def bulk(collection, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        await collection.insert_many(rows[start:start + batch_size], ordered=False)
+
+
+async def run(rows: int, batch_size: int):
+    client = motor.motor_asyncio.AsyncIOMotorClient(os.getenv("MONGO_DETAILS"))
+    collection = client["benchmark_db"]["employees_bulk_bench"]
+
+    for name, fn in (
+        ("single_record", lambda data: single_record(collection, data)),
+        ("insert_many", lambda data: bulk(collection, data, batch_size)),
+    ):
+        await collection.drop()
+        await collection.create_index("employee_id", unique=True)
+        data = [make_employee(i) for i in range(rows)]
+        started = time.perf_counter()
+        await fn(data)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>14}: {rows} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec)")
+
+    await collection.drop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.batch_size))
@@ -0,0 +1,50 @@
+"""
+Measures time-to-first-response of a freshly started API process:
+the time from spawning uvicorn until GET / answers, and until /health
+stops reporting "warming".
+
+    python -m benchmarks.bench_cold_start --runs 3
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def wait_for(server, url: str, started: float, ready) -> float:
+    while server.poll() is None:
+        try:
+            response = httpx.get(url, timeout=1)
+            if ready(response):
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"uvicorn exited with code {server.returncode} before {url} was ready")
+
+
+def run_once(port: int):
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        first = wait_for(server, f"{base}/", started, lambda r: r.status_code == 200)
+        warm = wait_for(server, f"{base}/health", started, lambda r: r.json().get("status") != "warming")
+        print(f"first response after {first:6.2f}s, setup finished after {warm:6.2f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    for _ in range(args.runs):
+        run_once(args.port)
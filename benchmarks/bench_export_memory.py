@@ -0,0 +1,138 @@
+"""
+Checks that GET /employees/export streams instead of buffering.
+
+Seeds synthetic employees into the "benchmark_db" database on the server
+configured by MONGO_DETAILS (dropped afterwards), starts the API under
+uvicorn in a subprocess against that database, downloads the export with httpx.stream and samples
+the server's RSS throughout. Exits with status 1 when the server grows by
+more than --max-growth-mb for any dataset size:
+
+    python -m benchmarks.bench_export_memory --rows 1000 --rows 200000
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+from benchmarks.data import seed_employees, use_benchmark_database
+
+BENCH_PREFIX = "BENCH-X"
+SAMPLE_INTERVAL_SECONDS = 0.01
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class RssSampler(threading.Thread):
+    """Records the peak RSS of a process until stopped."""
+
+    def __init__(self, pid: int):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.peak = rss_mb(pid)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, rss_mb(self.pid))
+            time.sleep(SAMPLE_INTERVAL_SECONDS)
+
+    def stop(self) -> float:
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+async def seed(rows: int):
+    from app.database import employee_collection
+    from app.department_stats import rebuild_department_stats
+
+    await employee_collection.delete_many({})
+    await seed_employees(employee_collection, rows, BENCH_PREFIX)
+    await rebuild_department_stats()
+
+
+async def cleanup():
+    from app.database import client, database
+
+    await client.drop_database(database.name)
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = {**os.environ, "RATE_LIMIT_ENABLED": "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    while server.poll() is None:
+        try:
+            if httpx.get(f"{base}/health", timeout=1).json().get("status") == "ok":
+                return server
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"uvicorn exited with code {server.returncode} before becoming healthy")
+
+
+def export_once(base: str, pid: int, export_format: str) -> tuple:
+    """Downloads the export and returns (bytes received, seconds, RSS growth in MiB)."""
+    baseline = rss_mb(pid)
+    sampler = RssSampler(pid)
+    sampler.start()
+    received = 0
+    started = time.perf_counter()
+    params = {"format": export_format}
+    try:
+        with httpx.stream("GET", f"{base}/employees/export", params=params, timeout=600) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                received += len(chunk)
+    finally:
+        peak = sampler.stop()
+    return received, time.perf_counter() - started, peak - baseline
+
+
+async def run(sizes, export_format: str, port: int, max_growth_mb: float) -> bool:
+    # The server subprocess inherits DATABASE_NAME from this process.
+    use_benchmark_database()
+    server = start_server(port)
+    base = f"http://127.0.0.1:{port}"
+    within_bound = True
+    try:
+        # Warm up imports, connection pools and allocator arenas first.
+        await seed(min(sizes))
+        await asyncio.to_thread(export_once, base, server.pid, export_format)
+
+        for rows in sizes:
+            await seed(rows)
+            received, elapsed, growth = await asyncio.to_thread(export_once, base, server.pid, export_format)
+            ok = growth <= max_growth_mb
+            within_bound &= ok
+            print(
+                f"{export_format:>6} {rows:>9} rows: {received / 2**20:8.1f} MiB sent in {elapsed:6.2f}s, "
+                f"server RSS growth {growth:6.1f} MiB {'ok' if ok else f'EXCEEDS {max_growth_mb} MiB'}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+        await cleanup()
+    return within_bound
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, action="append", help="Dataset size; repeat to compare sizes")
+    parser.add_argument("--format", default="ndjson", choices=["ndjson", "csv"])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--max-growth-mb", type=float, default=32,
+                        help="Fail if the server grows by more than this while streaming")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.rows or [1000, 200000], args.format, args.port, args.max_growth_mb)) else 1)
@@ -0,0 +1,56 @@
+"""
+Compares requests/sec of a 100-row employee page served the old way
+(response_model=List[dict], re-validated and encoded by FastAPI) with the
+fast path used by list_employees (FastJSONResponse returned directly).
+The page is built in memory, so only routing and serialization are measured:
+
+    python -m benchmarks.bench_list_serialization --requests 2000
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+
+from app.models import employee_helper
+from app.responses import FastJSONResponse
+from benchmarks.data import make_employee
+
+
+def build_app(page: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=List[dict])
+    async def legacy():
+        return [employee_helper(employee) for employee in page]
+
+    @app.get("/fast")
+    async def fast():
+        return FastJSONResponse([employee_helper(employee) for employee in page])
+
+    return app
+
+
+async def run(requests: int, rows: int):
+    page = [{**make_employee(i), "_id": ObjectId(), "version": 1} for i in range(rows)]
+    transport = httpx.ASGITransport(app=build_app(page))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/legacy", "/fast"):
+            for _ in range(50):
+                await client.get(path)
+            started = time.perf_counter()
+            for _ in range(requests):
+                await client.get(path)
+            elapsed = time.perf_counter() - started
+            print(f"{path:>8}: {requests / elapsed:8.0f} requests/sec ({rows} rows per page)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.rows))
@@ -0,0 +1,58 @@
+"""
+Measures read latency while a burst of logins is running.
+
+Drives the app in-process through httpx's ASGI transport: a steady stream of
+reads (GET / by default, which does not touch the database) runs alone and then
+alongside concurrent POST /token requests. With bcrypt off the event loop the
+two p99 figures should match:
+
+    python -m benchmarks.bench_login_burst --logins 20 --reads 500
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def timed_reads(client, path: str, count: int) -> list:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def login(client):
+    await client.post("/token", data={"username": "testuser", "password": "testpassword"})
+
+
+def p99(latencies: list) -> float:
+    return statistics.quantiles(latencies, n=100)[98]
+
+
+async def run(path: str, reads: int, logins: int):
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await login(client)  # warm up, computes the seed hash
+        quiet = await timed_reads(client, path, reads)
+
+        burst = asyncio.gather(*(login(client) for _ in range(logins)))
+        busy = await timed_reads(client, path, reads)
+        await burst
+
+    print(f"read p99 without logins: {p99(quiet):7.2f} ms")
+    print(f"read p99 during {logins} logins: {p99(busy):7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.path, args.reads, args.logins))
@@ -0,0 +1,119 @@
+"""
+Measures what the metrics cost on real requests: MetricsMiddleware plus the
+pymongo command and connection pool listeners that run on every database
+call. Each round starts a fresh process with METRICS_ENABLED on or off,
+drives create, get, list, update and delete through the app in-process
+against a "benchmark_db" database on the server configured by MONGO_DETAILS
+(dropped afterwards), and the best round per mode is compared. The metrics
+budget is 20 microseconds per request:
+
+    python -m benchmarks.bench_metrics_overhead --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.data import make_payload, use_benchmark_database
+
+BUDGET_MICROSECONDS = 20
+BENCH_PREFIX = "BENCH-M"
+OPERATIONS = ("create", "get", "list", "update", "delete")
+
+
+async def per_request_seconds(calls) -> float:
+    started = time.perf_counter()
+    for call in calls:
+        response = await call()
+        response.raise_for_status()
+    return (time.perf_counter() - started) / len(calls)
+
+
+async def measure(requests: int) -> dict:
+    """Runs in the child process; METRICS_ENABLED is already set in its environment."""
+    import httpx
+
+    use_benchmark_database()
+    from app.main import app
+    from app.auth import create_access_token
+    from app.database import client as mongo_client, database, init_database
+
+    await init_database(force=True)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'testuser'})}"}
+    employees = [make_payload(i, BENCH_PREFIX) for i in range(requests)]
+    ids = [e["employee_id"] for e in employees]
+
+    timings = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        # Warm up the connection pool and code paths before timing anything.
+        for e in employees[:50]:
+            await client.get(f"/employees/{e['employee_id']}")
+        timings["create"] = await per_request_seconds([
+            lambda e=e: client.post("/employees/", json=e) for e in employees
+        ])
+        timings["get"] = await per_request_seconds([
+            lambda i=i: client.get(f"/employees/{i}") for i in ids
+        ])
+        timings["list"] = await per_request_seconds([
+            lambda: client.get("/employees/", params={"limit": 20}) for _ in ids
+        ])
+        timings["update"] = await per_request_seconds([
+            lambda i=i: client.put(f"/employees/{i}", json={"name": "Renamed"}) for i in ids
+        ])
+        timings["delete"] = await per_request_seconds([
+            lambda i=i: client.delete(f"/employees/{i}") for i in ids
+        ])
+    await mongo_client.drop_database(database.name)
+    return timings
+
+
+def run_round(metrics_enabled: bool, requests: int) -> dict:
+    env = {
+        **os.environ,
+        "METRICS_ENABLED": str(metrics_enabled).lower(),
+        # Every timed request must reach MongoDB and none may be throttled.
+        "CACHE_TTL_SECONDS": "0",
+        "CACHE_BACKEND": "memory",
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_metrics_overhead", "--child", "--requests", str(requests)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(requests: int, rounds: int):
+    best = {True: {}, False: {}}
+    # Alternate the modes and keep the best of several rounds to damp server and scheduler noise.
+    for _ in range(rounds):
+        for metrics_enabled in (False, True):
+            for operation, seconds in run_round(metrics_enabled, requests).items():
+                best[metrics_enabled][operation] = min(seconds, best[metrics_enabled].get(operation, seconds))
+
+    print(f"{'':>8}  {'without':>10}  {'with':>10}  {'overhead':>10}")
+    overheads = []
+    for operation in OPERATIONS:
+        plain = best[False][operation] * 1e6
+        instrumented = best[True][operation] * 1e6
+        overheads.append(instrumented - plain)
+        print(f"{operation:>8}  {plain:8.1f}us  {instrumented:8.1f}us  {instrumented - plain:8.1f}us")
+    overhead = sum(overheads) / len(overheads)
+    verdict = "within" if overhead <= BUDGET_MICROSECONDS else "OVER"
+    print(f"mean overhead: {overhead:.1f} us/request ({verdict} the {BUDGET_MICROSECONDS} us budget)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.requests))))
+    else:
+        run(args.requests, args.rounds)
@@ -0,0 +1,83 @@
+"""
+Seeds synthetic employees (with search_terms) into the "benchmark_db"
+database on the server configured by MONGO_DETAILS, then times
+GET /employees/search and prints the winning query plan of each search so
+index use (IXSCAN / TEXT) can be confirmed. The database is dropped
+afterwards unless --keep-data is given; --skip-seed reuses kept data:
+
+    python -m benchmarks.bench_search --rows 1000000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.data import seed_employees, use_benchmark_database
+
+BENCH_PREFIX = "BENCH-S"
+QUERIES = [("pyt", "prefix"), ("employee 42", "prefix"), ("mongodb", "text"), ("engineering python", "text")]
+
+
+def winning_stages(plan: dict) -> list:
+    stages = []
+    while plan:
+        stages.append(plan.get("stage"))
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+async def seed(rows: int):
+    from app.database import employee_collection, init_database
+    from app.department_stats import rebuild_department_stats
+
+    await init_database(force=True)
+    await employee_collection.delete_many({})
+    await seed_employees(employee_collection, rows, BENCH_PREFIX)
+    await rebuild_department_stats()
+
+
+async def explain(q: str, mode: str):
+    from app.database import database, COLLECTION_NAME
+    from app.search import prefix_search_pipeline, text_search_pipeline
+
+    build = text_search_pipeline if mode == "text" else prefix_search_pipeline
+    result = await database.command(
+        "explain", {"aggregate": COLLECTION_NAME, "pipeline": build(q, 0, 20), "cursor": {}},
+        verbosity="queryPlanner"
+    )
+    stages = result.get("stages") or [{"$cursor": result}]
+    planner = stages[0]["$cursor"]["queryPlanner"]
+    return winning_stages(planner["winningPlan"].get("queryPlan", planner["winningPlan"]))
+
+
+async def run(rows: int, repeat: int, skip_seed: bool, keep_data: bool):
+    use_benchmark_database()
+    from app.main import app
+    from app.database import client as mongo_client, database
+
+    if not skip_seed:
+        await seed(rows)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for q, mode in QUERIES:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                response = await client.get("/employees/search", params={"q": q, "mode": mode})
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            plan = " <- ".join(await explain(q, mode))
+            print(f"{mode:>6} {q!r:>22}: {elapsed:7.2f} ms, {len(response.json())} rows, plan {plan}")
+
+    if not keep_data:
+        await mongo_client.drop_database(database.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true", help="Search the data kept by an earlier run")
+    parser.add_argument("--keep-data", action="store_true", help="Keep the benchmark database for --skip-seed")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat, args.skip_seed, args.keep_data))
@@ -0,0 +1,87 @@
+"""
+Counts MongoDB round trips and latency per write request (create, update,
+conditional update, delete) using pymongo command monitoring. Runs in-process
+against a "benchmark_db" database on the server configured by MONGO_DETAILS,
+which is dropped afterwards:
+
+    python -m benchmarks.bench_write_round_trips --requests 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+from pymongo import monitoring
+
+from benchmarks.data import make_payload, use_benchmark_database
+
+BENCH_PREFIX = "BENCH-W"
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def measure(label: str, counter: CommandCounter, calls):
+    latencies = []
+    counter.commands.clear()
+    for call in calls:
+        started = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - started) * 1000)
+    per_request = sum(counter.commands.values()) / len(calls)
+    detail = ", ".join(f"{name}={count / len(calls):.1f}" for name, count in sorted(counter.commands.items()))
+    print(f"{label:>18}: {per_request:4.1f} round trips/request ({detail}), "
+          f"p50 {statistics.median(latencies):6.2f} ms")
+
+
+async def run(requests: int):
+    counter = CommandCounter()
+    # Must be registered before the app builds its Motor client.
+    monitoring.register(counter)
+    use_benchmark_database()
+
+    from app.main import app
+    from app.auth import create_access_token
+    from app.database import client as mongo_client, database, init_database
+
+    await init_database(force=True)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'testuser'})}"}
+    employees = [make_payload(i, BENCH_PREFIX) for i in range(requests)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        await measure("create", counter, [
+            lambda e=e: client.post("/employees/", json=e) for e in employees
+        ])
+        await measure("update", counter, [
+            lambda e=e: client.put(f"/employees/{e['employee_id']}", json={"name": "Renamed"}) for e in employees
+        ])
+        await measure("update (If-Match)", counter, [
+            lambda e=e: client.put(
+                f"/employees/{e['employee_id']}", json={"skills": ["Go"]}, headers={"If-Match": '"2"'}
+            ) for e in employees
+        ])
+        await measure("delete", counter, [
+            lambda e=e: client.delete(f"/employees/{e['employee_id']}") for e in employees
+        ])
+    await mongo_client.drop_database(database.name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
@@ -0,0 +1,52 @@
+"""Synthetic employee generator shared by the benchmark scripts."""
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+# Benchmarks that write run against this database instead of DATABASE_NAME and
+# drop it afterwards, so they never touch real employees or department stats.
+BENCH_DATABASE = "benchmark_db"
+
+DEPARTMENTS = ["Engineering", "Sales", "HR", "Finance", "Marketing", "Support"]
+SKILLS = ["Python", "FastAPI", "MongoDB", "SQL", "Excel", "Go", "React", "Docker"]
+FIRST_NAMES = ["Asha", "Ben", "Chen", "Dara", "Elif", "Femi", "Gita", "Hugo", "Ines", "Jon"]
+
+
+def use_benchmark_database():
+    """Points the app at BENCH_DATABASE. Must run before any app module is imported."""
+    os.environ["DATABASE_NAME"] = BENCH_DATABASE
+
+
+def make_employee(i: int, prefix: str = "B", department: str = None, rng=random) -> dict:
+    """Returns an employee document shaped like the ones the API stores."""
+    return {
+        "employee_id": f"{prefix}{i:08d}",
+        "name": f"{rng.choice(FIRST_NAMES)} Employee {i}",
+        "department": department or rng.choice(DEPARTMENTS),
+        "salary": float(rng.randint(30000, 200000)),
+        "joining_date": datetime(2015, 1, 1) + timedelta(days=rng.randint(0, 3650)),
+        "skills": rng.sample(SKILLS, 3),
+    }
+
+
+def make_payload(i: int, prefix: str = "B", rng=random) -> dict:
+    """Returns the JSON body POST /employees/ expects for a synthetic employee."""
+    employee = make_employee(i, prefix, rng=rng)
+    employee["joining_date"] = employee["joining_date"].date().isoformat()
+    return employee
+
+
+async def seed_employees(collection, rows: int, prefix: str = "B", rng=random, batch_size: int = 10000):
+    """Inserts `rows` synthetic employees with the derived fields the API maintains."""
+    from app.search import search_terms
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    for start in range(0, rows, batch_size):
+        batch = []
+        for i in range(start, min(rows, start + batch_size)):
+            employee = make_employee(i, prefix, rng=rng)
+            employee["search_terms"] = search_terms(employee)
+            employee["version"] = 1
+            employee["updated_at"] = now
+            batch.append(employee)
+        await collection.insert_many(batch, ordered=False)
@@ -0,0 +1,240 @@
+"""
+Reproducible load test for every API route.
+
+Seeds N synthetic employees into a stand-in database, then drives each
+scenario in-process through httpx's ASGI transport with a fixed concurrency
+and reports throughput and p50/p95/p99 latency as JSON. Pass --baseline to
+diff the run against a stored result and fail on regressions.
+
+Database backends:
+  --db mock   mongomock-motor, fully in memory (pip install mongomock-motor)
+  --db local  the MongoDB at MONGO_DETAILS, e.g. a local mongod; the run
+              uses its own "benchmark_db" database and drops it afterwards
+
+    python -m benchmarks.harness --db mock --rows 5000 --output bench.json
+    python -m benchmarks.harness --db mock --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.data import DEPARTMENTS, SKILLS, make_payload, seed_employees, use_benchmark_database
+
+SEED_PREFIX = "H"
+
+
+def configure_database(backend: str):
+    """Points app.database at the stand-in database. Must run before the app is imported."""
+    import motor.motor_asyncio
+
+    # Every collection handle in the app derives from DATABASE_NAME, so the
+    # run never touches the real employee data and can drop it afterwards.
+    use_benchmark_database()
+    # Every request comes from one client, which would otherwise hit the rate limits.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if backend == "mock":
+        from mongomock_motor import AsyncMongoMockClient
+
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+    else:
+        os.environ.setdefault("MONGO_DETAILS", "mongodb://localhost:27017")
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def drive(client, name: str, make_request, requests: int, concurrency: int) -> dict:
+    """Runs `requests` calls of make_request(i) with `concurrency` workers and summarizes latency."""
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await make_request(client, i)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+    print(f"{name:>16}: {result['throughput_rps']:9.1f} req/s  p50 {result['p50_ms']:8.2f}  "
+          f"p95 {result['p95_ms']:8.2f}  p99 {result['p99_ms']:8.2f} ms  errors {errors}", file=sys.stderr)
+    return result
+
+
+async def deep_cursor(client, pages: int):
+    """Walks `pages` keyset pages and returns the cursor of the last one."""
+    cursor = ""
+    for _ in range(pages):
+        page = (await client.get("/employees/", params={"cursor": cursor, "limit": 100})).json()
+        if not page["next_cursor"]:
+            break
+        cursor = page["next_cursor"]
+    return cursor
+
+
+def scenarios(rows: int, deep_cursor_value: str, rng: random.Random):
+    """Returns (name, request factory, share of --requests) for every route under test."""
+    deep_skip = max(0, rows - 100)
+    ids = [f"{SEED_PREFIX}{i:08d}" for i in range(rows)]
+    new_ids = iter(range(10**6))
+
+    def employee_id(i):
+        return ids[(i * 7919) % len(ids)]
+
+    return [
+        ("list", lambda c, i: c.get("/employees/", params={"limit": 100}), 1.0),
+        ("list_department", lambda c, i: c.get(
+            "/employees/", params={"limit": 100, "department": DEPARTMENTS[i % len(DEPARTMENTS)]}), 1.0),
+        ("list_salary_range", lambda c, i: c.get("/employees/", params={
+            "limit": 100, "department": DEPARTMENTS[i % len(DEPARTMENTS)],
+            "min_salary": 50000 + (i % 10) * 10000, "max_salary": 90000 + (i % 10) * 10000}), 1.0),
+        ("list_summary", lambda c, i: c.get("/employees/", params={
+            "limit": 100, "fields": "summary", "joined_after": "2018-01-01", "min_salary": 60000}), 1.0),
+        ("deep_skip", lambda c, i: c.get("/employees/", params={"skip": deep_skip, "limit": 100}), 0.5),
+        ("deep_cursor", lambda c, i: c.get(
+            "/employees/", params={"cursor": deep_cursor_value, "limit": 100}), 1.0),
+        ("get", lambda c, i: c.get(f"/employees/{employee_id(i)}"), 1.0),
+        ("batch_get", lambda c, i: c.post(
+            "/employees/batch-get", json={"ids": [employee_id(i + k) for k in range(100)]}), 0.5),
+        ("search_prefix", lambda c, i: c.get(
+            "/employees/search", params={"q": SKILLS[i % len(SKILLS)][:3]}), 1.0),
+        ("search_text", lambda c, i: c.get(
+            "/employees/search", params={"q": SKILLS[i % len(SKILLS)], "mode": "text"}), 0.5),
+        ("avg_salary", lambda c, i: c.get("/employees/avg-salary/by-department"), 1.0),
+        ("analytics", lambda c, i: c.get("/employees/analytics"), 0.2),
+        ("create", lambda c, i: c.post(
+            "/employees/", json=make_payload(next(new_ids), "N", rng=rng)), 1.0),
+        ("update", lambda c, i: c.put(
+            f"/employees/{employee_id(i)}", json={"salary": float(rng.randint(30000, 200000))}), 1.0),
+        ("delete", lambda c, i: c.delete(f"/employees/{ids[-(i + 1)]}"), 0.5),
+        ("login", lambda c, i: c.post(
+            "/token", data={"username": "testuser", "password": "testpassword"}), 0.05),
+    ]
+
+
+async def run(args) -> dict:
+    configure_database(args.db)
+
+    from app.auth import create_access_token
+    from app.cache import cache
+    from app.database import client as mongo_client, database, employee_collection, init_database
+    from app.department_stats import rebuild_department_stats
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    await init_database(force=True)
+    await employee_collection.delete_many({})
+    await seed_employees(employee_collection, args.rows, SEED_PREFIX, rng=rng)
+    await rebuild_department_stats()
+
+    selected = set(args.scenario or [])
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'testuser'})}"}
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=headers, timeout=120
+    ) as http:
+        cursor = await deep_cursor(http, args.deep_pages)
+        for name, make_request, weight in scenarios(args.rows, cursor, rng):
+            if selected and name not in selected:
+                continue
+            if not args.warm_cache:
+                await cache.clear()
+            requests = max(args.concurrency, int(args.requests * weight))
+            results[name] = await drive(http, name, make_request, requests, args.concurrency)
+
+    if args.db == "local":
+        await mongo_client.drop_database(database.name)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "db": args.db,
+            "rows": args.rows,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Lists scenarios whose throughput dropped or p95 grew by more than `tolerance` (a fraction)."""
+    regressions = []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        rps_change = now["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0
+        p95_change = now["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0
+        print(f"{name:>16}: throughput {rps_change:+7.1%}  p95 {p95_change:+7.1%}", file=sys.stderr)
+        if rps_change < -tolerance or p95_change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", choices=["mock", "local"], default="mock")
+    parser.add_argument("--rows", type=int, default=5000, help="Synthetic employees to seed")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario (scaled per route)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--deep-pages", type=int, default=20, help="Keyset pages walked for deep_cursor")
+    parser.add_argument("--scenario", action="append", help="Only run these scenarios (repeatable)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the read cache between scenarios")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    parser.add_argument("--baseline", help="Compare against a stored JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression as a fraction")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
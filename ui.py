@@ -1,19 +1,20 @@
 import streamlit as st
 import requests
 import pandas as pd
+import time
 from datetime import datetime
+import api_client
 
-# Configuration 
-API_BASE_URL = "https://employees-management-backend-9jey.onrender.com"
+REPORT_POLL_SECONDS = 1
 
 # Authentication Function
 def login_user(username, password):
     """Logs in the user and stores the token in the session state."""
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/token",
-            data={"username": username, "password": password},
-            timeout=5
+        response = api_client.request(
+            "POST",
+            "/token",
+            data={"username": username, "password": password}
         )
         response.raise_for_status()  
         st.session_state['token'] = response.json()['access_token']
@@ -30,6 +31,72 @@ def get_auth_headers():
         return {"Authorization": f"Bearer {st.session_state['token']}"}
     return {}
 
+# Live Updates
+# Visited employee list pages are cached in the session, keyed by
+# (department filter, cursor). On every rerun only the changes since the last
+# sync are fetched from /employees/events and applied to the cached pages.
+def apply_employee_event(page_cache, event):
+    """Applies one insert/update/delete event to the cached list pages."""
+    if event["op"] == "reset":
+        page_cache.clear()
+        return
+
+    if event["op"] == "update":
+        employee = event["employee"]
+        cached = next(
+            (row for page_data in page_cache.values() for row in page_data["items"] if row["id"] == event["id"]),
+            None
+        )
+        # Pages are ordered by joining_date and filtered by department, so a row
+        # that may have moved (or was not cached to compare) invalidates the
+        # pages it left and the ones it could join; reload those on demand.
+        if cached is None or any(cached.get(field) != employee[field] for field in ("department", "joining_date")):
+            for (department, cursor), page_data in list(page_cache.items()):
+                if (not department or department == employee["department"]
+                        or any(row["id"] == event["id"] for row in page_data["items"])):
+                    del page_cache[(department, cursor)]
+            return
+
+    for (department, cursor), page_data in list(page_cache.items()):
+        if event["op"] == "insert":
+            # A new row shifts every page it belongs to; reload those on demand.
+            if not department or department == event["employee"]["department"]:
+                del page_cache[(department, cursor)]
+            continue
+
+        if not any(row["id"] == event["id"] for row in page_data["items"]):
+            continue
+        if event["op"] == "delete":
+            page_data["items"] = [row for row in page_data["items"] if row["id"] != event["id"]]
+        else:
+            page_data["items"] = [
+                event["employee"] if row["id"] == event["id"] else row for row in page_data["items"]
+            ]
+
+def sync_employee_changes():
+    """Fetches the employee changes since the last sync and applies them to the cached pages."""
+    if 'page_cache' not in st.session_state:
+        st.session_state.page_cache = {}
+        st.session_state.last_event_id = None
+
+    try:
+        response = api_client.get(
+            "/employees/events",
+            params={"once": True, "last_event_id": st.session_state.last_event_id},
+            cached=False
+        )
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        st.session_state.page_cache = {}
+        return
+
+    feed = response.json()
+    if feed["reset"]:
+        st.session_state.page_cache.clear()
+    for event in feed["events"]:
+        apply_employee_event(st.session_state.page_cache, event)
+    st.session_state.last_event_id = feed["last_event_id"]
+
 # UI Layout
 st.set_page_config(page_title="Employee Dashboard", layout="wide")
 st.title("Employee Management System")
@@ -78,7 +145,7 @@ else:
                     "salary": salary, "joining_date": joining_date.isoformat(), "skills": skills_list
                 }
                 headers = get_auth_headers()
-                response = requests.post(f"{API_BASE_URL}/employees/", json=employee_data, headers=headers)
+                response = api_client.post("/employees/", json=employee_data, headers=headers)
                 if response.status_code == 201:
                     st.success("Employee created successfully!")
                     st.json(response.json())
@@ -89,11 +156,11 @@ else:
     elif page == "View & Search Employees":
         st.header("View and Search Employee Records")
 
-        # Search by Skill
-        with st.expander("Search by Skill"):
-            skill_search = st.text_input("Enter a skill to search for")
-            if st.button("Search Skill"):
-                response = requests.get(f"{API_BASE_URL}/employees/search/?skill={skill_search}")
+        # Search by name, skill or department
+        with st.expander("Search Employees"):
+            search_query = st.text_input("Enter a name, skill or department (prefixes work too)")
+            if st.button("Search"):
+                response = api_client.get("/employees/search", params={"q": search_query})
                 if response.status_code == 200:
                     st.dataframe(pd.DataFrame(response.json()))
                 else:
@@ -105,35 +172,48 @@ else:
         st.subheader("All Employees")
         department_filter = st.text_input("Filter by Department (optional)")
 
-        if 'page_num' not in st.session_state:
-            st.session_state.page_num = 0
+        # Keyset pagination: remember the cursor that opened each visited page
+        if st.session_state.get('page_department') != department_filter:
+            st.session_state.page_department = department_filter
+            st.session_state.page_cursors = [""]
 
         limit = 10
-        skip = st.session_state.page_num * limit
-
-        params = {"skip": skip, "limit": limit}
+        params = {"cursor": st.session_state.page_cursors[-1], "limit": limit}
         if department_filter:
             params["department"] = department_filter
 
-        response = requests.get(f"{API_BASE_URL}/employees/", params=params)
-        if response.status_code == 200:
-            employees = response.json()
+        sync_employee_changes()
+        page_key = (department_filter, params["cursor"])
+        page_data = st.session_state.page_cache.get(page_key)
+        if page_data is None:
+            response = api_client.get("/employees/", params=params, cached=False)
+            if response.status_code == 200:
+                page_data = response.json()
+                page_data["total"] = response.headers.get("X-Total-Count")
+                st.session_state.page_cache[page_key] = page_data
+
+        if page_data is not None:
+            employees = page_data["items"]
             if employees:
                 df = pd.DataFrame(employees)
                 st.dataframe(df)
+                if page_data.get("total"):
+                    pages = max(1, -(-int(page_data["total"]) // limit))
+                    st.caption(f"Page {len(st.session_state.page_cursors)} of {pages} "
+                               f"({page_data['total']} employees)")
             else:
                 st.info("No more employees to display.")
 
             col1, col2 = st.columns(2)
             with col1:
-                if st.session_state.page_num > 0:
+                if len(st.session_state.page_cursors) > 1:
                     if st.button("⬅ Previous Page"):
-                        st.session_state.page_num -= 1
+                        st.session_state.page_cursors.pop()
                         st.rerun()
             with col2:
-                if len(employees) == limit:
+                if page_data["next_cursor"]:
                     if st.button("Next Page"):
-                        st.session_state.page_num += 1
+                        st.session_state.page_cursors.append(page_data["next_cursor"])
                         st.rerun()
         else:
             st.error("Could not fetch employee list.")
@@ -145,7 +225,8 @@ else:
         employee_id_to_manage = st.text_input("Enter Employee ID to manage")
 
         if employee_id_to_manage:
-            response = requests.get(f"{API_BASE_URL}/employees/{employee_id_to_manage}")
+            # Uncached: the version sent as If-Match must be the current one.
+            response = api_client.get(f"/employees/{employee_id_to_manage}", cached=False)
             if response.status_code == 200:
                 employee_data = response.json()
                 st.success(f"Loaded data for {employee_data['name']}")
@@ -164,11 +245,14 @@ else:
                             "name": name, "department": department, "salary": salary,
                             "joining_date": joining_date.isoformat(), "skills": skills_list
                         }
-                        headers = get_auth_headers()
-                        response = requests.put(f"{API_BASE_URL}/employees/{employee_id_to_manage}", json=update_data, headers=headers)
+                        # If-Match makes the update fail instead of overwriting a newer edit
+                        headers = {**get_auth_headers(), "If-Match": f'"{employee_data["version"]}"'}
+                        response = api_client.put(f"/employees/{employee_id_to_manage}", json=update_data, headers=headers)
                         if response.status_code == 200:
                             st.success("Employee updated successfully!")
                             st.json(response.json())
+                        elif response.status_code == 412:
+                            st.error("This employee was changed by someone else. Reload the page to see the latest data.")
                         else:
                             st.error(f"Error: {response.status_code} - {response.text}")
                 
@@ -177,7 +261,7 @@ else:
                 if st.checkbox(f"I confirm I want to delete employee {employee_id_to_manage}"):
                     if st.button("DELETE EMPLOYEE RECORD", type="primary"):
                         headers = get_auth_headers()
-                        response = requests.delete(f"{API_BASE_URL}/employees/{employee_id_to_manage}", headers=headers)
+                        response = api_client.delete(f"/employees/{employee_id_to_manage}", headers=headers)
                         if response.status_code == 200:
                             st.success("Employee deleted successfully.")
                         else:
@@ -187,22 +271,87 @@ else:
                 st.error("Employee not found.")
 
 
-    #  Page 4: Get Employees Avg Salary by Department
+    #  Page 4: Department Analytics (one $facet request for every chart)
     elif page == "Department Analytics":
         st.header("Department Analytics")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            analytics_department = st.text_input("Department (optional)")
+        with col2:
+            use_dates = st.checkbox("Filter by joining date")
+            date_range = st.date_input(
+                "Joined between",
+                value=(datetime(2000, 1, 1).date(), datetime.now().date()),
+                disabled=not use_dates
+            )
+        with col3:
+            interval = st.selectbox("Joining histogram by", ["month", "year"])
+
         if st.button("Generate Report"):
-            response = requests.get(f"{API_BASE_URL}/employees/avg-salary/by-department")
-            if response.status_code == 200 and response.json():
-                data = response.json()
-                st.success("Report generated!")
-                
-                df = pd.DataFrame(data)
-                df = df.set_index("department")
+            params = {"interval": interval}
+            if analytics_department:
+                params["department"] = analytics_department
+            if use_dates and len(date_range) == 2:
+                params["joined_after"] = date_range[0].isoformat()
+                params["joined_before"] = date_range[1].isoformat()
 
-                st.subheader("Average Salary by Department")
-                st.dataframe(df)
+            # The report runs as a background job; reruns poll it so no request waits for the aggregation.
+            response = api_client.request(
+                "POST", "/jobs", json={"kind": "analytics", "params": params}, headers=get_auth_headers()
+            )
+            if response.status_code == 202:
+                st.session_state.report_job = response.json()["id"]
+                st.session_state.pop("report", None)
+            else:
+                st.error(f"Could not start the report: {response.text}")
+
+        if st.session_state.get("report_job"):
+            job_id = st.session_state.report_job
+            response = api_client.request("GET", f"/jobs/{job_id}", headers=get_auth_headers())
+            job = response.json() if response.ok else {"status": "failed", "error": response.text}
+            if job["status"] in ("queued", "running"):
+                st.progress(job["progress"], text=f"Generating report ({job['status']})...")
+                time.sleep(REPORT_POLL_SECONDS)
+                st.rerun()
+            del st.session_state.report_job
+            if job["status"] == "succeeded":
+                response = api_client.request("GET", f"/jobs/{job_id}/result", headers=get_auth_headers())
+                if response.ok:
+                    st.session_state.report = response.json()
+                else:
+                    st.error(f"Could not download the report: {response.text}")
+            else:
+                st.error(f"Report failed: {job['error']}")
+
+        data = st.session_state.get("report")
+        if data is not None:
+            if data["headcount"]:
+                st.success(f"Report generated for {data['headcount']} employees!")
+
+                departments = pd.DataFrame([
+                    {**{k: v for k, v in row.items() if k != "percentiles"}, **row["percentiles"]}
+                    for row in data["departments"]
+                ]).set_index("department")
+
+                st.subheader("Headcount and Salary by Department")
+                st.dataframe(departments)
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.subheader("Average Salary")
+                    st.bar_chart(departments['avg_salary'])
+                with col2:
+                    st.subheader("Headcount")
+                    st.bar_chart(departments['headcount'])
+
+                st.subheader("Salary Percentiles")
+                st.bar_chart(departments[[c for c in departments.columns if c.startswith("p")]])
+
+                st.subheader("Joining Date Histogram")
+                st.bar_chart(pd.DataFrame(data["joining_histogram"]).set_index("period")["count"])
 
-                st.subheader("Salary Comparison Chart")
-                st.bar_chart(df['avg_salary'])
+                st.subheader("Top Skills")
+                st.bar_chart(pd.DataFrame(data["top_skills"]).set_index("skill")["count"])
             else:
                 st.warning("No data available to generate a report.")